@@ -1,9 +1,528 @@
+from concurrent.futures import ProcessPoolExecutor
+import logging
+from types import SimpleNamespace
 import numpy as np
+from numba import njit
 from scipy.integrate import solve_ivp
 import scipy as sc
-from ..parameters.lerebours_parameters import Lerebours_Parameters
+from ..parameters.lerebours_parameters import Lerebours_Parameters, PARAM_DTYPE
 from .scheiner_model import Scheiner_Model
 
+log = logging.getLogger(__name__)
+
+# fields of the structured parameter record passed to the compiled right-hand side (see
+# Lerebours_Model.pack_parameters): the scalar parameters in the layout of Lerebours_Parameters.as_array, followed by
+# terms derived from them and the load case
+PARAMETER_DTYPE = np.dtype(PARAM_DTYPE.descr + [(name, np.float64) for name in (
+    'MCSF_activation_OCu', 'RANKL_RANK_binding', 'start_time', 'end_time', 'PTH_injection', 'OPG_injection',
+    'RANKL_injection', 'update_mechanical_effects')])
+
+# indices of the steady-state array and of the mechanical state array written by the compiled right-hand side
+STEADY_STATE_OBu, STEADY_STATE_OCu, STEADY_STATE_strain_energy_density = 0, 1, 2
+MECHANICS_RANKL_production, MECHANICS_strain_effect_on_OBp, MECHANICS_strain_energy_density = 0, 1, 2
+# volume fractions and stress vector at which the stored strain energy density was evaluated (cache key)
+MECHANICS_cached_vascular_pore_fraction, MECHANICS_cached_bone_volume_fraction, MECHANICS_cached_stress_vector = 3, 4, 5
+# volume fractions closer than this to the cache key reuse the stored strain energy density
+STRAIN_ENERGY_DENSITY_CACHE_TOLERANCE = 1e-12
+
+
+@njit(cache=True, fastmath=True)
+def _strain_energy_density(vascular_pore_fraction, bone_volume_fraction, stress_vector, mechanics_tensors):
+    """ Compiled version of :meth:`Lerebours_Model.calculate_strain_energy_density` (Eqs. (9)-(15) in Scheiner et al.
+    (2013)).
+
+    :param vascular_pore_fraction: vascular pore volume fraction in %
+    :type vascular_pore_fraction: float
+    :param bone_volume_fraction: bone volume fraction in %
+    :type bone_volume_fraction: float
+    :param stress_vector: macroscopic stress vector
+    :type stress_vector: numpy.ndarray
+    :param mechanics_tensors: unit tensor, stiffness tensors of vascular pores and bone matrix and dilute strain
+        concentration tensor of the vascular pores (all as 6x6 matrices)
+    :type mechanics_tensors: numpy.ndarray
+    :return: microscopic strain energy density
+    :rtype: float"""
+    unit_tensor = mechanics_tensors[0]
+    stiffness_tensor_vascular_pores = mechanics_tensors[1]
+    stiffness_tensor_bone_matrix = mechanics_tensors[2]
+    dilute_strain_concentration_vascular_pores = mechanics_tensors[3]
+    strain_concentration = np.linalg.inv(bone_volume_fraction / 100 * dilute_strain_concentration_vascular_pores +
+                                         bone_volume_fraction / 100 * unit_tensor)
+    strain_concentration_tensor_bone_matrix = unit_tensor @ strain_concentration
+    strain_concentration_tensor_vascular_pores = dilute_strain_concentration_vascular_pores @ strain_concentration
+    macroscopic_stiffness_tensor = ((vascular_pore_fraction / 100) * stiffness_tensor_vascular_pores
+                                    @ strain_concentration_tensor_vascular_pores +
+                                    (bone_volume_fraction / 100) * stiffness_tensor_bone_matrix
+                                    @ strain_concentration_tensor_bone_matrix)
+    macroscopic_strain_tensor = np.linalg.solve(macroscopic_stiffness_tensor, stress_vector)
+    microscopic_strain_tensor = strain_concentration_tensor_bone_matrix @ macroscopic_strain_tensor
+    return 0.5 * (microscopic_strain_tensor @ (stiffness_tensor_bone_matrix @ microscopic_strain_tensor))
+
+
+@njit(cache=True, fastmath=True)
+def _cached_strain_energy_density(vascular_pore_fraction, bone_volume_fraction, stress_index, stress_vectors,
+                                  mechanics_tensors, mechanical_state):
+    """ Returns the strain energy density stored in ``mechanical_state`` if it was evaluated for the same stress vector
+    and (up to ``STRAIN_ENERGY_DENSITY_CACHE_TOLERANCE``) the same volume fractions, otherwise evaluates
+    :func:`_strain_energy_density` and stores the result together with its cache key. The ODE solver evaluates the
+    right-hand side and Jacobian repeatedly at (nearly) unchanged volume fractions, since these change slowly compared
+    to the cell concentrations.
+
+    :param vascular_pore_fraction: vascular pore volume fraction
+    :type vascular_pore_fraction: float
+    :param bone_volume_fraction: bone volume fraction
+    :type bone_volume_fraction: float
+    :param stress_index: index of the macroscopic stress vector in ``stress_vectors``
+    :type stress_index: int
+    :param stress_vectors: macroscopic stress vectors for normal loading and the load case
+    :type stress_vectors: numpy.ndarray
+    :param mechanics_tensors: constant 6x6 tensors needed for the strain energy density
+    :type mechanics_tensors: numpy.ndarray
+    :param mechanical_state: mechanical state, see :meth:`Lerebours_Model.pack_parameters`
+    :type mechanical_state: numpy.ndarray
+    :return: microscopic strain energy density
+    :rtype: float"""
+    if (mechanical_state[MECHANICS_cached_stress_vector] == stress_index and
+            abs(vascular_pore_fraction - mechanical_state[MECHANICS_cached_vascular_pore_fraction]) <=
+            STRAIN_ENERGY_DENSITY_CACHE_TOLERANCE and
+            abs(bone_volume_fraction - mechanical_state[MECHANICS_cached_bone_volume_fraction]) <=
+            STRAIN_ENERGY_DENSITY_CACHE_TOLERANCE):
+        return mechanical_state[MECHANICS_strain_energy_density]
+    strain_energy_density = _strain_energy_density(vascular_pore_fraction * 100, bone_volume_fraction * 100,
+                                                   stress_vectors[stress_index], mechanics_tensors)
+    mechanical_state[MECHANICS_strain_energy_density] = strain_energy_density
+    mechanical_state[MECHANICS_cached_vascular_pore_fraction] = vascular_pore_fraction
+    mechanical_state[MECHANICS_cached_bone_volume_fraction] = bone_volume_fraction
+    mechanical_state[MECHANICS_cached_stress_vector] = stress_index
+    return strain_energy_density
+
+
+@njit(cache=True, fastmath=True, inline='always')
+def _fused_rhs(x, t, params, steady_state, mechanical_state, mechanics_tensors, stress_vectors, dxdt):
+    """ Fused kernel of the right-hand side of the transient Lerebours ODE system. It inlines the ``calculate_*``
+    helpers of :class:`Lerebours_Model` (TGF-beta, PTH, OPG, RANKL and MCSF signalling and the piecewise mechanical
+    feedback on OBp proliferation) as scalar intermediates and writes the six rates of change directly into ``dxdt``,
+    so that no Python attribute lookups or temporary arrays are needed while the ODE solver is running.
+
+    The mechanical state (RANKL production, strain effect on OBp and strain energy density) is written to
+    ``mechanical_state`` in place, as it is stored on the model and parameters by the Python implementation.
+
+    :param x: state variables [OBp, OBa, OCp, OCa, vascular_pore_fraction, bone_volume_fraction]
+    :type x: numpy.ndarray
+    :param t: time variable
+    :type t: float
+    :param params: parameter record with fields as in ``PARAMETER_DTYPE``, see :meth:`Lerebours_Model.pack_parameters`
+    :type params: numpy.void
+    :param steady_state: steady-state values [OBu, OCu, strain_energy_density]
+    :type steady_state: numpy.ndarray
+    :param mechanical_state: mechanical state [RANKL_production, strain_effect_on_OBp, strain_energy_density] and
+        the cache key of the strain energy density
+    :type mechanical_state: numpy.ndarray
+    :param mechanics_tensors: constant 6x6 tensors needed for the strain energy density
+    :type mechanics_tensors: numpy.ndarray
+    :param stress_vectors: macroscopic stress vectors for normal loading and the load case
+    :type stress_vectors: numpy.ndarray
+    :param dxdt: output array for the rate of change of state variables
+    :type dxdt: numpy.ndarray
+    :return: None"""
+    OBp, OBa, OCp, OCa, vascular_pore_fraction, bone_volume_fraction = x[0], x[1], x[2], x[3], x[4], x[5]
+    OBu = steady_state[STEADY_STATE_OBu]
+    OCu = steady_state[STEADY_STATE_OCu]
+    in_load_case = params.start_time <= t <= params.end_time
+
+    # TGF-beta signalling
+    TGFb = ((params.bone_volume_stored_TGFb_content * OCa * params.bone_volume_resorption_rate *
+             (1 / params.calibration_OCa)) / params.degradation_rate_TGFb)
+    TGFb_activation_OBu = TGFb / (TGFb + params.activation_coefficient_TGFb_OBu)
+    TGFb_repression_OBp = params.repression_coefficient_TGFb_OBp / (TGFb + params.repression_coefficient_TGFb_OBp)
+    TGFb_activation_OCa = TGFb / (TGFb + params.activation_coefficient_TGFb_OCa)
+
+    # mechanical feedback on OBp proliferation and RANKL production
+    if t <= params.start_time or params.update_mechanical_effects == 0:
+        strain_effect_on_OBp = 0.0
+    else:
+        stress_index = 0 if t >= params.end_time else 1
+        strain_energy_density = _cached_strain_energy_density(vascular_pore_fraction, bone_volume_fraction,
+                                                              stress_index, stress_vectors, mechanics_tensors,
+                                                              mechanical_state)
+        strain_energy_density_steady_state = steady_state[STEADY_STATE_strain_energy_density]
+        strain_effect_on_OBp = ((strain_energy_density - strain_energy_density_steady_state) /
+                                (strain_energy_density_steady_state + params.mechanics_correction_factor))
+        if strain_effect_on_OBp > 0:
+            mechanical_state[MECHANICS_RANKL_production] = 0.0
+        else:
+            mechanical_state[MECHANICS_RANKL_production] = (- params.mechanics_biomech_transduction_strength_RANKL *
+                                                             strain_effect_on_OBp)
+    mechanical_state[MECHANICS_strain_effect_on_OBp] = strain_effect_on_OBp
+    # proliferation factor between 1 (no or negative stimulus) and 2 (saturated stimulus)
+    proliferation_factor = min(max(1 + params.mechanics_biomech_transduction_strength * strain_effect_on_OBp, 1.0), 2.0)
+    mechanical_effect = params.proliferation_rate_OBp * proliferation_factor * OBp
+
+    # PTH signalling
+    PTH = params.production_rate_intrinsic_PTH
+    if in_load_case:
+        PTH += params.PTH_injection
+    PTH_activation_OB = PTH / (PTH + params.activation_coefficient_PTH_OB)
+    PTH_repression_OB = params.repression_coefficient_PTH_OB / (PTH + params.repression_coefficient_PTH_OB)
+
+    # OPG and RANKL signalling
+    temp_PTH_OB = ((params.production_rate_bool_OBp_produce_OPG * params.production_rate_min_OPG_per_cell * OBp +
+                    params.production_rate_bool_OBa_produce_OPG * params.production_rate_min_OPG_per_cell * OBa) *
+                   (1 / params.calibration_OBa) * PTH_repression_OB)
+    OPG_injection = params.OPG_injection if in_load_case else 0.0
+    OPG = (((temp_PTH_OB + OPG_injection) * params.concentration_OPG_max) /
+           (temp_PTH_OB + params.degradation_rate_OPG * params.concentration_OPG_max))
+    RANKL_eff = ((params.production_rate_bool_OBp_produce_RANKL * params.production_rate_max_RANKL_per_cell * OBp +
+                  params.production_rate_bool_OBa_produce_RANKL * params.production_rate_max_RANKL_per_cell * OBa) *
+                 PTH_activation_OB)
+    RANKL_RANK_OPG = RANKL_eff / (1 + params.binding_constant_RANKL_OPG * OPG +
+                                  params.RANKL_RANK_binding)
+    RANKL_injection = params.RANKL_injection if in_load_case else 0.0
+    RANKL = RANKL_RANK_OPG * ((params.production_rate_intrinsic_RANKL * OBp + RANKL_injection +
+                               mechanical_state[MECHANICS_RANKL_production]) /
+                              (params.production_rate_intrinsic_RANKL * OBp +
+                               params.degradation_rate_RANKL * RANKL_eff))
+    RANKL_activation_OCp = RANKL / (RANKL + params.activation_coefficient_RANKL_RANK)
+    MCSF_activation_OCu = params.MCSF_activation_OCu
+
+    dxdt[0] = (params.differentiation_rate_OBu * TGFb_activation_OBu * OBu -
+               params.differentiation_rate_OBp * OBp * TGFb_repression_OBp + mechanical_effect)
+    dxdt[1] = params.differentiation_rate_OBp * OBp * TGFb_repression_OBp - params.apoptosis_rate_OBa * OBa
+    dxdt[2] = (params.differentiation_rate_OCu * RANKL_activation_OCp * MCSF_activation_OCu * OCu -
+               params.differentiation_rate_OCp * RANKL_activation_OCp * OCp)
+    dxdt[3] = (params.differentiation_rate_OCp * RANKL_activation_OCp * OCp -
+               params.apoptosis_rate_OCa * OCa * TGFb_activation_OCa)
+    dxdt[4] = params.bone_volume_resorption_rate * OCa - params.bone_volume_formation_rate * OBa
+    dxdt[5] = params.bone_volume_formation_rate * OBa - params.bone_volume_resorption_rate * OCa
+
+
+@njit(cache=True, fastmath=True)
+def _rhs(x, t, params, steady_state, mechanical_state, mechanics_tensors, stress_vectors):
+    """ Compiled right-hand side of the transient Lerebours ODE system, see :func:`_fused_rhs`. A new array is
+    returned in every call, since some scipy solvers keep references to previous evaluations.
+
+    The mechanical state (RANKL production, strain effect on OBp and strain energy density) is written to
+    ``mechanical_state`` in place, as it is stored on the model and parameters by the Python implementation.
+
+    :param x: state variables [OBp, OBa, OCp, OCa, vascular_pore_fraction, bone_volume_fraction]
+    :type x: numpy.ndarray
+    :param t: time variable
+    :type t: float
+    :param params: parameter record with fields as in ``PARAMETER_DTYPE``, see :meth:`Lerebours_Model.pack_parameters`
+    :type params: numpy.void
+    :param steady_state: steady-state values [OBu, OCu, strain_energy_density]
+    :type steady_state: numpy.ndarray
+    :param mechanical_state: mechanical state [RANKL_production, strain_effect_on_OBp, strain_energy_density] and
+        the cache key of the strain energy density
+    :type mechanical_state: numpy.ndarray
+    :param mechanics_tensors: constant 6x6 tensors needed for the strain energy density
+    :type mechanics_tensors: numpy.ndarray
+    :param stress_vectors: macroscopic stress vectors for normal loading and the load case
+    :type stress_vectors: numpy.ndarray
+    :return: rate of change of state variables
+    :rtype: numpy.ndarray"""
+    dxdt = np.empty(6)
+    _fused_rhs(x, t, params, steady_state, mechanical_state, mechanics_tensors, stress_vectors, dxdt)
+    return dxdt
+
+
+@njit(cache=True, fastmath=True)
+def _jac(x, t, params, steady_state, mechanical_state, mechanics_tensors, stress_vectors):
+    """ Compiled analytic Jacobian of :func:`_rhs` with respect to the state variables
+    [OBp, OBa, OCp, OCa, vascular_pore_fraction, bone_volume_fraction]. The signalling terms are rational (Hill)
+    functions and are differentiated in closed form. The strain energy density depends on the volume fractions through
+    the inverse of the macroscopic stiffness tensor, its partial derivatives are computed by central differences.
+
+    :param x: state variables [OBp, OBa, OCp, OCa, vascular_pore_fraction, bone_volume_fraction]
+    :type x: numpy.ndarray
+    :param t: time variable
+    :type t: float
+    :param params: parameter record with fields as in ``PARAMETER_DTYPE``, see :meth:`Lerebours_Model.pack_parameters`
+    :type params: numpy.void
+    :param steady_state: steady-state values [OBu, OCu, strain_energy_density]
+    :type steady_state: numpy.ndarray
+    :param mechanical_state: mechanical state [RANKL_production, strain_effect_on_OBp, strain_energy_density] and
+        the cache key of the strain energy density
+    :type mechanical_state: numpy.ndarray
+    :param mechanics_tensors: constant 6x6 tensors needed for the strain energy density
+    :type mechanics_tensors: numpy.ndarray
+    :param stress_vectors: macroscopic stress vectors for normal loading and the load case
+    :type stress_vectors: numpy.ndarray
+    :return: Jacobian matrix (6x6)
+    :rtype: numpy.ndarray"""
+    OBp, OBa, OCp, OCa, vascular_pore_fraction, bone_volume_fraction = x[0], x[1], x[2], x[3], x[4], x[5]
+    OBu = steady_state[STEADY_STATE_OBu]
+    OCu = steady_state[STEADY_STATE_OCu]
+    in_load_case = params.start_time <= t <= params.end_time
+
+    # TGF-beta signalling and derivatives with respect to OCa
+    dTGFb_dOCa = ((params.bone_volume_stored_TGFb_content * params.bone_volume_resorption_rate *
+                   (1 / params.calibration_OCa)) / params.degradation_rate_TGFb)
+    TGFb = dTGFb_dOCa * OCa
+    TGFb_repression_OBp = params.repression_coefficient_TGFb_OBp / (TGFb + params.repression_coefficient_TGFb_OBp)
+    TGFb_activation_OCa = TGFb / (TGFb + params.activation_coefficient_TGFb_OCa)
+    dTGFb_activation_OBu_dOCa = (params.activation_coefficient_TGFb_OBu /
+                                 (TGFb + params.activation_coefficient_TGFb_OBu) ** 2 * dTGFb_dOCa)
+    dTGFb_repression_OBp_dOCa = (- params.repression_coefficient_TGFb_OBp /
+                                 (TGFb + params.repression_coefficient_TGFb_OBp) ** 2 * dTGFb_dOCa)
+    dTGFb_activation_OCa_dOCa = (params.activation_coefficient_TGFb_OCa /
+                                 (TGFb + params.activation_coefficient_TGFb_OCa) ** 2 * dTGFb_dOCa)
+
+    # mechanical feedback and derivatives with respect to the volume fractions
+    strain_effect_on_OBp = 0.0
+    dstrain_effect_dvascular_pore_fraction = 0.0
+    dstrain_effect_dbone_volume_fraction = 0.0
+    RANKL_production = mechanical_state[MECHANICS_RANKL_production]
+    dRANKL_production_dvascular_pore_fraction = 0.0
+    dRANKL_production_dbone_volume_fraction = 0.0
+    if t > params.start_time and params.update_mechanical_effects != 0:
+        stress_index = 0 if t >= params.end_time else 1
+        stress_vector = stress_vectors[stress_index]
+        normalization = steady_state[STEADY_STATE_strain_energy_density] + params.mechanics_correction_factor
+        strain_effect_on_OBp = ((_cached_strain_energy_density(vascular_pore_fraction, bone_volume_fraction,
+                                                               stress_index, stress_vectors, mechanics_tensors,
+                                                               mechanical_state) -
+                                 steady_state[STEADY_STATE_strain_energy_density]) / normalization)
+        step = 1e-7
+        dstrain_effect_dvascular_pore_fraction = (
+                (_strain_energy_density((vascular_pore_fraction + step) * 100, bone_volume_fraction * 100,
+                                        stress_vector, mechanics_tensors) -
+                 _strain_energy_density((vascular_pore_fraction - step) * 100, bone_volume_fraction * 100,
+                                        stress_vector, mechanics_tensors)) / (2 * step) / normalization)
+        dstrain_effect_dbone_volume_fraction = (
+                (_strain_energy_density(vascular_pore_fraction * 100, (bone_volume_fraction + step) * 100,
+                                        stress_vector, mechanics_tensors) -
+                 _strain_energy_density(vascular_pore_fraction * 100, (bone_volume_fraction - step) * 100,
+                                        stress_vector, mechanics_tensors)) / (2 * step) / normalization)
+        if strain_effect_on_OBp > 0:
+            RANKL_production = 0.0
+        else:
+            RANKL_production = - params.mechanics_biomech_transduction_strength_RANKL * strain_effect_on_OBp
+            dRANKL_production_dvascular_pore_fraction = (- params.mechanics_biomech_transduction_strength_RANKL *
+                                                         dstrain_effect_dvascular_pore_fraction)
+            dRANKL_production_dbone_volume_fraction = (- params.mechanics_biomech_transduction_strength_RANKL *
+                                                       dstrain_effect_dbone_volume_fraction)
+    if strain_effect_on_OBp <= 0:
+        dmechanical_effect_dOBp = params.proliferation_rate_OBp
+        dmechanical_effect_dstrain_effect = 0.0
+    elif strain_effect_on_OBp < 1 / params.mechanics_biomech_transduction_strength:
+        dmechanical_effect_dOBp = params.proliferation_rate_OBp * (
+                1 + params.mechanics_biomech_transduction_strength * strain_effect_on_OBp)
+        dmechanical_effect_dstrain_effect = (params.proliferation_rate_OBp *
+                                             params.mechanics_biomech_transduction_strength * OBp)
+    else:
+        dmechanical_effect_dOBp = 2 * params.proliferation_rate_OBp
+        dmechanical_effect_dstrain_effect = 0.0
+
+    # PTH signalling
+    PTH = params.production_rate_intrinsic_PTH
+    if in_load_case:
+        PTH += params.PTH_injection
+    PTH_activation_OB = PTH / (PTH + params.activation_coefficient_PTH_OB)
+    PTH_repression_OB = params.repression_coefficient_PTH_OB / (PTH + params.repression_coefficient_PTH_OB)
+
+    # OPG and RANKL signalling and derivatives with respect to OBp, OBa and the volume fractions
+    dtemp_PTH_OB_dOBp = (params.production_rate_bool_OBp_produce_OPG * params.production_rate_min_OPG_per_cell *
+                         (1 / params.calibration_OBa) * PTH_repression_OB)
+    dtemp_PTH_OB_dOBa = (params.production_rate_bool_OBa_produce_OPG * params.production_rate_min_OPG_per_cell *
+                         (1 / params.calibration_OBa) * PTH_repression_OB)
+    temp_PTH_OB = dtemp_PTH_OB_dOBp * OBp + dtemp_PTH_OB_dOBa * OBa
+    OPG_injection = params.OPG_injection if in_load_case else 0.0
+    OPG_denominator = temp_PTH_OB + params.degradation_rate_OPG * params.concentration_OPG_max
+    OPG = (temp_PTH_OB + OPG_injection) * params.concentration_OPG_max / OPG_denominator
+    dOPG_dtemp_PTH_OB = (params.concentration_OPG_max *
+                         (params.degradation_rate_OPG * params.concentration_OPG_max - OPG_injection) /
+                         OPG_denominator ** 2)
+    dRANKL_eff_dOBp = (params.production_rate_bool_OBp_produce_RANKL * params.production_rate_max_RANKL_per_cell *
+                       PTH_activation_OB)
+    dRANKL_eff_dOBa = (params.production_rate_bool_OBa_produce_RANKL * params.production_rate_max_RANKL_per_cell *
+                       PTH_activation_OB)
+    RANKL_eff = dRANKL_eff_dOBp * OBp + dRANKL_eff_dOBa * OBa
+    binding_denominator = (1 + params.binding_constant_RANKL_OPG * OPG +
+                           params.RANKL_RANK_binding)
+    RANKL_RANK_OPG = RANKL_eff / binding_denominator
+    dRANKL_RANK_OPG_dOBp = (dRANKL_eff_dOBp / binding_denominator - RANKL_eff * params.binding_constant_RANKL_OPG *
+                            dOPG_dtemp_PTH_OB * dtemp_PTH_OB_dOBp / binding_denominator ** 2)
+    dRANKL_RANK_OPG_dOBa = (dRANKL_eff_dOBa / binding_denominator - RANKL_eff * params.binding_constant_RANKL_OPG *
+                            dOPG_dtemp_PTH_OB * dtemp_PTH_OB_dOBa / binding_denominator ** 2)
+    RANKL_injection = params.RANKL_injection if in_load_case else 0.0
+    production_numerator = params.production_rate_intrinsic_RANKL * OBp + RANKL_injection + RANKL_production
+    production_denominator = params.production_rate_intrinsic_RANKL * OBp + params.degradation_rate_RANKL * RANKL_eff
+    production_fraction = production_numerator / production_denominator
+    dproduction_fraction_dOBp = ((params.production_rate_intrinsic_RANKL * production_denominator -
+                                  production_numerator * (params.production_rate_intrinsic_RANKL +
+                                                          params.degradation_rate_RANKL * dRANKL_eff_dOBp)) /
+                                 production_denominator ** 2)
+    dproduction_fraction_dOBa = (- production_numerator * params.degradation_rate_RANKL * dRANKL_eff_dOBa /
+                                 production_denominator ** 2)
+    RANKL = RANKL_RANK_OPG * production_fraction
+    dRANKL_activation_OCp_dRANKL = (params.activation_coefficient_RANKL_RANK /
+                                    (RANKL + params.activation_coefficient_RANKL_RANK) ** 2)
+    RANKL_activation_OCp = RANKL / (RANKL + params.activation_coefficient_RANKL_RANK)
+    dRANKL_activation_OCp_dOBp = dRANKL_activation_OCp_dRANKL * (dRANKL_RANK_OPG_dOBp * production_fraction +
+                                                                 RANKL_RANK_OPG * dproduction_fraction_dOBp)
+    dRANKL_activation_OCp_dOBa = dRANKL_activation_OCp_dRANKL * (dRANKL_RANK_OPG_dOBa * production_fraction +
+                                                                 RANKL_RANK_OPG * dproduction_fraction_dOBa)
+    dRANKL_activation_OCp_dvascular_pore_fraction = (dRANKL_activation_OCp_dRANKL * RANKL_RANK_OPG *
+                                                     dRANKL_production_dvascular_pore_fraction /
+                                                     production_denominator)
+    dRANKL_activation_OCp_dbone_volume_fraction = (dRANKL_activation_OCp_dRANKL * RANKL_RANK_OPG *
+                                                   dRANKL_production_dbone_volume_fraction / production_denominator)
+    MCSF_activation_OCu = params.MCSF_activation_OCu
+
+    jacobian = np.zeros((6, 6))
+    jacobian[0, 0] = - params.differentiation_rate_OBp * TGFb_repression_OBp + dmechanical_effect_dOBp
+    jacobian[0, 3] = (params.differentiation_rate_OBu * dTGFb_activation_OBu_dOCa * OBu -
+                      params.differentiation_rate_OBp * OBp * dTGFb_repression_OBp_dOCa)
+    jacobian[0, 4] = dmechanical_effect_dstrain_effect * dstrain_effect_dvascular_pore_fraction
+    jacobian[0, 5] = dmechanical_effect_dstrain_effect * dstrain_effect_dbone_volume_fraction
+    jacobian[1, 0] = params.differentiation_rate_OBp * TGFb_repression_OBp
+    jacobian[1, 1] = - params.apoptosis_rate_OBa
+    jacobian[1, 3] = params.differentiation_rate_OBp * OBp * dTGFb_repression_OBp_dOCa
+    OCp_production = params.differentiation_rate_OCu * MCSF_activation_OCu * OCu - params.differentiation_rate_OCp * OCp
+    jacobian[2, 0] = OCp_production * dRANKL_activation_OCp_dOBp
+    jacobian[2, 1] = OCp_production * dRANKL_activation_OCp_dOBa
+    jacobian[2, 2] = - params.differentiation_rate_OCp * RANKL_activation_OCp
+    jacobian[2, 4] = OCp_production * dRANKL_activation_OCp_dvascular_pore_fraction
+    jacobian[2, 5] = OCp_production * dRANKL_activation_OCp_dbone_volume_fraction
+    jacobian[3, 0] = params.differentiation_rate_OCp * OCp * dRANKL_activation_OCp_dOBp
+    jacobian[3, 1] = params.differentiation_rate_OCp * OCp * dRANKL_activation_OCp_dOBa
+    jacobian[3, 2] = params.differentiation_rate_OCp * RANKL_activation_OCp
+    jacobian[3, 3] = - params.apoptosis_rate_OCa * (TGFb_activation_OCa + OCa * dTGFb_activation_OCa_dOCa)
+    jacobian[3, 4] = params.differentiation_rate_OCp * OCp * dRANKL_activation_OCp_dvascular_pore_fraction
+    jacobian[3, 5] = params.differentiation_rate_OCp * OCp * dRANKL_activation_OCp_dbone_volume_fraction
+    jacobian[4, 1] = - params.bone_volume_formation_rate
+    jacobian[4, 3] = params.bone_volume_resorption_rate
+    jacobian[5, 1] = params.bone_volume_formation_rate
+    jacobian[5, 3] = - params.bone_volume_resorption_rate
+    return jacobian
+
+
+@njit(cache=True, fastmath=True)
+def _batch_rhs(x, t, params, steady_state, mechanical_state, mechanics_tensors, stress_vectors):
+    """ Compiled right-hand side of several independent Lerebours ODE systems stacked into one state vector, i.e.
+    :func:`_fused_rhs` evaluated for every model. The arguments are those of :func:`_rhs`, stacked along the first
+    axis (one entry per model).
+
+    :param x: stacked state variables [OBp, OBa, OCp, OCa, vascular_pore_fraction, bone_volume_fraction] of all models
+    :type x: numpy.ndarray
+    :param t: time variable
+    :type t: float
+    :param params: parameter records of the models
+    :type params: numpy.ndarray
+    :param steady_state: steady-state values of the models
+    :type steady_state: numpy.ndarray
+    :param mechanical_state: mechanical states of the models
+    :type mechanical_state: numpy.ndarray
+    :param mechanics_tensors: constant 6x6 tensors of the models
+    :type mechanics_tensors: numpy.ndarray
+    :param stress_vectors: macroscopic stress vectors of the models
+    :type stress_vectors: numpy.ndarray
+    :return: stacked rate of change of state variables
+    :rtype: numpy.ndarray"""
+    dxdt = np.empty_like(x)
+    for i in range(params.shape[0]):
+        _fused_rhs(x[6 * i:6 * i + 6], t, params[i], steady_state[i], mechanical_state[i], mechanics_tensors[i],
+                   stress_vectors[i], dxdt[6 * i:6 * i + 6])
+    return dxdt
+
+
+@njit(cache=True, fastmath=True)
+def _batch_jac(x, t, params, steady_state, mechanical_state, mechanics_tensors, stress_vectors):
+    """ Compiled Jacobian of :func:`_batch_rhs`. The models are independent, so the Jacobian is block diagonal with the
+    6x6 Jacobians of :func:`_jac`. It is returned in the packed banded format of LSODA with five lower and five upper
+    diagonals, ``packed[5 + i - j, j] = jacobian[i, j]``.
+
+    :param x: stacked state variables of all models
+    :type x: numpy.ndarray
+    :param t: time variable
+    :type t: float
+    :param params: parameter records of the models
+    :type params: numpy.ndarray
+    :param steady_state: steady-state values of the models
+    :type steady_state: numpy.ndarray
+    :param mechanical_state: mechanical states of the models
+    :type mechanical_state: numpy.ndarray
+    :param mechanics_tensors: constant 6x6 tensors of the models
+    :type mechanics_tensors: numpy.ndarray
+    :param stress_vectors: macroscopic stress vectors of the models
+    :type stress_vectors: numpy.ndarray
+    :return: packed banded Jacobian (11 x number of state variables)
+    :rtype: numpy.ndarray"""
+    packed = np.zeros((11, x.shape[0]))
+    for i in range(params.shape[0]):
+        jacobian = _jac(x[6 * i:6 * i + 6], t, params[i], steady_state[i], mechanical_state[i], mechanics_tensors[i],
+                        stress_vectors[i])
+        for row in range(6):
+            for column in range(6):
+                packed[5 + row - column, 6 * i + column] = jacobian[row, column]
+    return packed
+
+
+def solve_bone_cell_population_models(bone_cell_models, tspan, initial_conditions, packed_parameters=None,
+                                      t_eval=None):
+    """ Solves the bone cell population models of several independent models (e.g. the RVEs of a spatial model) in a
+    single call of the LSODA solver, with the states of all models stacked into one state vector. This avoids the
+    overhead of one solver call (and of its Python steps) per model. The Jacobian is block diagonal and passed to LSODA
+    as a banded matrix, so a solver step costs about the same as the separate steps of all models. The step size is
+    shared by all models, so the solutions agree with separate solves within the solver tolerances.
+
+    The parameters of every model are packed as in :meth:`Lerebours_Model.solve_bone_cell_population_model` and the
+    mechanical state at the end of the solve is stored on every model. Models that share a load case also share the
+    load case stress tensor, so if the models are loaded by different stresses, the parameters have to be packed right
+    after setting the stress of each model and passed as ``packed_parameters``.
+
+    :param bone_cell_models: models to solve, including their steady states and stress tensors
+    :type bone_cell_models: list of Lerebours_Model
+    :param tspan: time span for the ODE solver
+    :type tspan: numpy.ndarray with start and end time
+    :param initial_conditions: initial conditions with one row [OBp, OBa, OCp, OCa, porosity, BV/TV] per model
+    :type initial_conditions: numpy.ndarray
+    :param packed_parameters: result of :meth:`Lerebours_Model.pack_parameters` for every model, if None the
+        parameters are packed here
+    :type packed_parameters: list of tuple or None
+    :param t_eval: times at which the solution is stored, if None every internal solver step is stored
+    :type t_eval: numpy.ndarray or None
+    :return: solution of the stacked ODE system, the states of model i are the rows 6*i to 6*i+5 of ``solution.y``
+    :rtype: scipy.integrate._ivp.ivp.OdeResult"""
+    if packed_parameters is None:
+        packed_parameters = [bone_cell_model.pack_parameters() for bone_cell_model in bone_cell_models]
+    params, steady_state, mechanical_state, mechanics_tensors, stress_vectors = zip(*packed_parameters)
+    params = np.array(list(params), dtype=PARAMETER_DTYPE)
+    steady_state, mechanical_state, mechanics_tensors, stress_vectors = (
+        np.array(arrays) for arrays in (steady_state, mechanical_state, mechanics_tensors, stress_vectors))
+    solution = solve_ivp(lambda t, x: _batch_rhs(x, t, params, steady_state, mechanical_state, mechanics_tensors,
+                                                 stress_vectors),
+                         tspan, np.ravel(initial_conditions).astype(float), rtol=1e-8, atol=1e-10, method='LSODA',
+                         max_step=1, t_eval=t_eval, lband=5, uband=5,
+                         jac=lambda t, x: _batch_jac(x, t, params, steady_state, mechanical_state, mechanics_tensors,
+                                                     stress_vectors))
+    for bone_cell_model, model_mechanical_state in zip(bone_cell_models, mechanical_state):
+        bone_cell_model.unpack_mechanical_state(model_mechanical_state)
+    if not solution.success:
+        log.warning(f"Integration failed: {solution.message}")
+    return solution
+
+
+def _solve_porosity(load_case, porosity, tspan, specific_surface_multiplier, t_eval):
+    """ Solves a fresh Lerebours model for a single porosity, used as worker by
+    :meth:`Lerebours_Model.solve_porosity_batch`.
+
+    :param load_case: load case for the model
+    :type load_case: Lerebours_Load_Case
+    :param porosity: Porosity of the bone ([0,1])
+    :type porosity: float
+    :param tspan: time span for the ODE solver
+    :type tspan: numpy.ndarray with start and end time
+    :param specific_surface_multiplier: multiplier of the specific surface
+    :type specific_surface_multiplier: float
+    :param t_eval: times at which the solution is stored, if None every internal solver step is stored
+    :type t_eval: numpy.ndarray or None
+    :return: solution of the ODE system
+    :rtype: scipy.integrate._ivp.ivp.OdeResult"""
+    model = Lerebours_Model(load_case, porosity, specific_surface_multiplier)
+    return model.solve_bone_cell_population_model(tspan, porosity, t_eval=t_eval)
+
 
 class Lerebours_Model(Scheiner_Model):
     """
@@ -22,7 +541,7 @@ class Lerebours_Model(Scheiner_Model):
        Biomechanics and Modeling in Mechanobiology, 15(1), 43-67.
        :doi:`10.1007/s10237-015-0705-x`
     """
-    def __init__(self, load_case, porosity, specific_surface_multiplier=1):
+    def __init__(self, load_case, porosity, specific_surface_multiplier=1, verbose=False, parameters=None):
         """
         Initializes the model with local geometry and loading conditions.
 
@@ -32,11 +551,23 @@ class Lerebours_Model(Scheiner_Model):
                 the specific surface area for cell recruitment.
             specific_surface_multiplier (float, optional): Adjusts the surface
                 availability for cell attachment. Defaults to 1.
+            verbose (bool, optional): If True, the calculated steady states are
+                logged (at debug level). Defaults to False.
+            parameters (Lerebours_Parameters, optional): Parameter instance to use
+                instead of building new default parameters. Note that the mechanical
+                state (steady-state strain energy density, mechanically induced RANKL
+                production, normal loading stress) is stored in the parameters, so it
+                is shared by all models using the same instance. It is reset when a
+                steady state is calculated, so an instance can be reused by models
+                solved one after the other (e.g. a porosity sweep), but not by models
+                whose solves are interleaved. Defaults to None.
         """
         super().__init__(load_case)
-        self.parameters = Lerebours_Parameters()
+        self.parameters = Lerebours_Parameters() if parameters is None else parameters
         self.initial_guess_root = np.array([0.0001, 0.0001, 0.001, 0.0001, porosity, 1 - porosity])
-        self.steady_state = type('', (), {})()
+        # a plain namespace (unlike an instance of an anonymous class) can be pickled, e.g. to solve models in worker
+        # processes
+        self.steady_state = SimpleNamespace()
         self.steady_state.OBu = None
         self.steady_state.OBp = None
         self.steady_state.OBa = None
@@ -44,8 +575,34 @@ class Lerebours_Model(Scheiner_Model):
         self.steady_state.OCp = None
         self.steady_state.OCa = None
         self.specific_surface_multiplier = specific_surface_multiplier
+        # if False, the transient model has no mechanical feedback on OBp proliferation and RANKL production
         self.update_mechanical_effects = True
+        self.verbose = verbose
         self.mechanical_effect_on_OBp = 0
+        # initial conditions of the transient solve, filled with the steady state in solve_bone_cell_population_model
+        self.steady_state_initial_conditions = np.empty(6)
+        # tensors written by set_macroscopic_stress_tensor
+        self.stress_tensor_normal_loading = np.zeros((3, 3))
+        self.stress_tensor_load_case = np.zeros((3, 3))
+        self.MCSF_activation_OCu = None
+        self.RANKL_RANK_binding = None
+        self.PTH_regulation_OB = None
+        self.PTH_regulation_OB_time = np.nan
+        self.calculate_constant_terms()
+
+    def calculate_constant_terms(self):
+        """ Calculates the subexpressions of the signalling pathways that only depend on constant parameters, i.e. the
+        MCSF activation of uncommitted osteoclasts and the RANKL-RANK binding term, and stores them as attributes so
+        they are not recomputed in every evaluation of the ODE system. Must be called again if the corresponding
+        parameters are changed. It also resets the cached PTH regulation of osteoblasts.
+
+        :return: None
+        """
+        self.MCSF_activation_OCu = self.parameters.concentration.MCSF / (
+                self.parameters.concentration.MCSF + self.parameters.activation_coefficient.MCSF_OCu)
+        self.RANKL_RANK_binding = self.parameters.binding_constant.RANKL_RANK * self.parameters.concentration.RANK
+        # NaN never equals a time, so the PTH regulation is recomputed on its next evaluation
+        self.PTH_regulation_OB_time = np.nan
 
     def bone_cell_population_model(self, x, t=None):
         """
@@ -59,8 +616,8 @@ class Lerebours_Model(Scheiner_Model):
         :type x: list
         :param t: Time variable; if None, the model assumes a steady-state calculation.
         :type t: float or None
-        :return: List of rates of change [dOBp/dt, dOBa/dt, dOCp/dt, dOCa/dt, dVPF/dt, dBVF/dt].
-        :rtype: list
+        :return: Rates of change [dOBp/dt, dOBa/dt, dOCp/dt, dOCa/dt, dVPF/dt, dBVF/dt].
+        :rtype: numpy.ndarray
         """
         if t is None:
             # steady state for given OBa, OCa
@@ -72,26 +629,40 @@ class Lerebours_Model(Scheiner_Model):
             OBu = self.steady_state.OBu
             OBp, OBa, OCp, OCa, vascular_pore_fraction, bone_volume_fraction = x
 
+        # signalling terms used in several rate equations are evaluated once per call
+        TGFb_repression_OBp = self.calculate_TGFb_repression_OBp(OCa, t)
+
+        # without mechanical feedback OBp proliferate at the base rate (the steady state always initialises the
+        # steady-state strain energy density)
+        if t is None or self.update_mechanical_effects:
+            OBp_proliferation = self.apply_mechanical_effects(OBp, OBa, OCa, vascular_pore_fraction * 100,
+                                                              bone_volume_fraction * 100, t)
+        else:
+            OBp_proliferation = self.parameters.proliferation_rate.OBp * OBp
         dOBpdt = (self.parameters.differentiation_rate.OBu * self.calculate_TGFb_activation_OBu(OCa, t) * OBu -
-                  self.parameters.differentiation_rate.OBp * OBp *
-                  self.calculate_TGFb_repression_OBp(OCa, t) + self.apply_mechanical_effects(OBp, OBa, OCa,
-                                                                                             vascular_pore_fraction * 100,
-                                                                                             bone_volume_fraction * 100,
-                                                                                             t))
+                  self.parameters.differentiation_rate.OBp * OBp * TGFb_repression_OBp + OBp_proliferation)
 
-        dOBadt = (self.parameters.differentiation_rate.OBp * OBp * self.calculate_TGFb_repression_OBp(OCa, t) -
+        dOBadt = (self.parameters.differentiation_rate.OBp * OBp * TGFb_repression_OBp -
                   self.parameters.apoptosis_rate.OBa * OBa)
 
-        dOCpdt = (self.parameters.differentiation_rate.OCu * self.calculate_RANKL_activation_OCu(OBp, OBa, t) *
-                  self.calculate_MCSF_activation_OCu() * OCu - self.parameters.differentiation_rate.OCp *
-                  self.calculate_RANKL_activation_OCp(OBp, OBa, t) * OCp)
+        # evaluated after the mechanical effects, which update the mechanically induced RANKL production;
+        # RANKL activation of OCu is identical to that of OCp (see calculate_RANKL_activation_OCu)
+        RANKL_activation_OCp = self.calculate_RANKL_activation_OCp(OBp, OBa, t)
+        dOCpdt = (self.parameters.differentiation_rate.OCu * RANKL_activation_OCp * self.MCSF_activation_OCu * OCu -
+                  self.parameters.differentiation_rate.OCp * RANKL_activation_OCp * OCp)
 
-        dOCadt = (self.parameters.differentiation_rate.OCp * self.calculate_RANKL_activation_OCp(OBp, OBa, t) * OCp -
+        dOCadt = (self.parameters.differentiation_rate.OCp * RANKL_activation_OCp * OCp -
                   self.parameters.apoptosis_rate.OCa * OCa * self.calculate_TGFb_activation_OCa(OCa, t))
 
         dvascular_pore_fractiondt = self.parameters.bone_volume.resorption_rate * OCa - self.parameters.bone_volume.formation_rate * OBa
         dbone_volume_fractiondt = self.parameters.bone_volume.formation_rate * OBa - self.parameters.bone_volume.resorption_rate * OCa
-        dxdt = [dOBpdt, dOBadt, dOCpdt, dOCadt, dvascular_pore_fractiondt, dbone_volume_fractiondt]
+        dxdt = np.empty(6)
+        dxdt[0] = dOBpdt
+        dxdt[1] = dOBadt
+        dxdt[2] = dOCpdt
+        dxdt[3] = dOCadt
+        dxdt[4] = dvascular_pore_fractiondt
+        dxdt[5] = dbone_volume_fractiondt
         return dxdt
 
     def calculate_RANKL_activation_OCu(self, OBp, OBa, t):
@@ -141,15 +712,14 @@ class Lerebours_Model(Scheiner_Model):
         :type t: float
         :return: RANKL concentration
         :rtype: float """
+        parameters = self.parameters
         RANKL_eff = self.calculate_effective_carrying_capacity_RANKL(OBp, OBa, t)
-        RANKL_RANK_OPG = RANKL_eff / (1 + self.parameters.binding_constant.RANKL_OPG *
-                                      self.calculate_OPG_concentration(OBp, OBa, t) +
-                                      self.parameters.binding_constant.RANKL_RANK * self.parameters.concentration.RANK)
-        RANKL = RANKL_RANK_OPG * ((self.parameters.production_rate.intrinsic_RANKL * OBp +
-                                   self.calculate_external_injection_RANKL(
-                                       t) + self.parameters.mechanics.RANKL_production) /
-                                  (self.parameters.production_rate.intrinsic_RANKL * OBp +
-                                   self.parameters.degradation_rate.RANKL * RANKL_eff))
+        RANKL_RANK_OPG = RANKL_eff / (1 + parameters.binding_constant.RANKL_OPG *
+                                      self.calculate_OPG_concentration(OBp, OBa, t) + self.RANKL_RANK_binding)
+        intrinsic_RANKL_production = parameters.production_rate.intrinsic_RANKL * OBp
+        RANKL = RANKL_RANK_OPG * ((intrinsic_RANKL_production + self.calculate_external_injection_RANKL(t) +
+                                   parameters.mechanics.RANKL_production) /
+                                  (intrinsic_RANKL_production + parameters.degradation_rate.RANKL * RANKL_eff))
         return RANKL
 
     def calculate_PTH_concentration(self, t):
@@ -162,15 +732,49 @@ class Lerebours_Model(Scheiner_Model):
         PTH = self.parameters.production_rate.intrinsic_PTH + self.calculate_external_injection_PTH(t)
         return PTH
 
+    def calculate_PTH_regulation_OB(self, t):
+        """ Calculates the activation and repression of osteoblasts by PTH. Both only depend on time, so the last result
+        is cached together with its time and reused when the solver evaluates the model repeatedly at the same time
+        (the cache is reset in calculate_constant_terms).
+
+        :param t: time variable
+        :type t: float
+        :return: activation and repression of osteoblasts by PTH
+        :rtype: tuple of float"""
+        if t != self.PTH_regulation_OB_time:
+            PTH = self.calculate_PTH_concentration(t)
+            self.PTH_regulation_OB = (PTH / (PTH + self.parameters.activation_coefficient.PTH_OB),
+                                      self.parameters.repression_coefficient.PTH_OB /
+                                      (PTH + self.parameters.repression_coefficient.PTH_OB))
+            self.PTH_regulation_OB_time = t
+        return self.PTH_regulation_OB
+
+    def calculate_PTH_activation_OB(self, t):
+        """ Calculates the activation of osteoblasts by parathyroid hormone (PTH), see calculate_PTH_regulation_OB.
+
+        :param t: time variable
+        :type t: float
+        :return: activation of osteoblasts by PTH
+        :rtype: float"""
+        return self.calculate_PTH_regulation_OB(t)[0]
+
+    def calculate_PTH_repression_OB(self, t):
+        """ Calculates the repression of osteoblasts by parathyroid hormone (PTH), see calculate_PTH_regulation_OB.
+
+        :param t: time variable
+        :type t: float
+        :return: repression of osteoblasts by PTH
+        :rtype: float"""
+        return self.calculate_PTH_regulation_OB(t)[1]
+
     def calculate_MCSF_activation_OCu(self):
         """ Calculates the MCSF activation for uncommitted osteoclast cells (OCu) based on the MCSF concentration
-        (constant parameter) and activation coefficient (Hill function).
+        (constant parameter) and activation coefficient (Hill function). The value is precomputed in
+        calculate_constant_terms.
 
         :return: MCSF activation for uncommitted osteoclast cells (OCu)
         :rtype: float"""
-        MCSF_activation_OCu = self.parameters.concentration.MCSF / (
-                self.parameters.concentration.MCSF + self.parameters.activation_coefficient.MCSF_OCu)
-        return MCSF_activation_OCu
+        return self.MCSF_activation_OCu
 
     def calculate_TGFb_concentration(self, OCa, t):
         """ Calculates the TGFb concentration based on the stored TGFb content in bone volume, active osteoclasts,
@@ -200,72 +804,126 @@ class Lerebours_Model(Scheiner_Model):
         :type t: float
         :return: OPG concentration
         :rtype: float"""
-        temp_PTH_OB = ((self.parameters.production_rate.bool_OBp_produce_OPG *
-                        self.parameters.production_rate.min_OPG_per_cell * OBp +
-                        self.parameters.production_rate.bool_OBa_produce_OPG *
-                        self.parameters.production_rate.min_OPG_per_cell * OBa) * (
-                               1 / self.parameters.calibration.OBa) *
+        production_rate = self.parameters.production_rate
+        OPG_max = self.parameters.concentration.OPG_max
+        temp_PTH_OB = ((production_rate.bool_OBp_produce_OPG * OBp + production_rate.bool_OBa_produce_OPG * OBa) *
+                       production_rate.min_OPG_per_cell / self.parameters.calibration.OBa *
                        self.calculate_PTH_repression_OB(t))
-        OPG = (((temp_PTH_OB + self.calculate_external_injection_OPG(t)) * self.parameters.concentration.OPG_max) /
-               (temp_PTH_OB + self.parameters.degradation_rate.OPG * self.parameters.concentration.OPG_max))
+        OPG = (((temp_PTH_OB + self.calculate_external_injection_OPG(t)) * OPG_max) /
+               (temp_PTH_OB + self.parameters.degradation_rate.OPG * OPG_max))
         return OPG
 
     def specific_surface(self, porosity):
         """ This function calculates the specific surface of bone based on the porosity. The specific surface multiplier
         is used for the boundaries in Modiz et al. (irrelevant for this model), default is 1.
+        The polynomial in the bone volume fraction (1 - porosity) is evaluated in Horner form, so that porosity can also
+        be passed as an array for porosity sweeps.
 
         :param porosity: Porosity of the bone
-        :type porosity: float
+        :type porosity: float or numpy.ndarray
         :return: Specific surface of bone
-        :rtype: float"""
-        specific_surface = self.specific_surface_multiplier * (
-                32.2 * (1 - porosity) - 93.9 * (1 - porosity) ** 2 + 134 * (1 - porosity) ** 3 - 101 * (
-                1 - porosity) ** 4 + 28.8 * (1 - porosity) ** 5)
+        :rtype: float or numpy.ndarray"""
+        u = 1.0 - np.asarray(porosity, dtype=float)
+        specific_surface = self.specific_surface_multiplier * u * (
+                32.2 + u * (-93.9 + u * (134.0 + u * (-101.0 + 28.8 * u))))
         return specific_surface
 
     def calculate_turnover(self, porosity):
         """ Calculates the turnover based on porosity, calibration factor and specific surface.
         The calibration factor was identified by fitting the SV curve to turnover datapoints.
+        For a porosity of 0 or 1 the turnover is 0. Porosity can also be passed as an array.
 
         :param porosity: Porosity of the bone
-        :type porosity: float
+        :type porosity: float or numpy.ndarray
         :return: Turnover rate
-        :rtype: float """
+        :rtype: float or numpy.ndarray """
         # calibration_factor = 3.996636532576335e-05
         # calibration_factor = 0.255
-        if porosity == 0 or porosity == 1:
-            turnover = 0
-        else:
-            turnover = self.parameters.calibration.turnover * self.specific_surface(porosity)
+        porosity = np.asarray(porosity, dtype=float)
+        turnover = np.where((porosity == 0) | (porosity == 1), 0.0,
+                            self.parameters.calibration.turnover * self.specific_surface(porosity))
+        if turnover.ndim == 0:
+            turnover = turnover.item()
         return turnover
 
     def calculate_steady_state(self, porosity):
         """ Calculates the steady state for the bone cell population model based on the porosity. It determines the
         active osteoclasts and osteoblasts based on the turnover, and then solves the bone cell population model for
         steady state of uncommitted and precursor cells. The steady state concentrations are stored as parameters
-        (uncommitted stays constant for all further calculation).
+        (uncommitted stays constant for all further calculation). The volume fractions of the initial guess, which are
+        also used for the steady-state strain energy density, are set to the given porosity.
+
+        The mechanical state in the parameters (steady-state strain energy density and mechanically induced RANKL
+        production) is reset first, so that the steady state belongs to this porosity even if the parameter instance
+        was used before, e.g. by a model with another porosity.
 
         :param porosity: Porosity of the bone
         :type porosity: float
         :return: None
         """
+        self.parameters.mechanics.strain_energy_density_steady_state = None
+        self.parameters.mechanics.RANKL_production = 0
+        self.calculate_constant_terms()
+        self.initial_guess_root[4] = porosity
+        self.initial_guess_root[5] = 1 - porosity
         turnover = self.calculate_turnover(porosity)
         self.steady_state.OCa = turnover / self.parameters.bone_volume.resorption_rate
         self.steady_state.OBa = turnover / self.parameters.bone_volume.formation_rate
 
-        cells_steady_state = sc.optimize.root(self.bone_cell_population_model, self.initial_guess_root, tol=1e-15,
-                                              options={'xtol': 1e-15}, method='lm')
-        self.steady_state.OBu = cells_steady_state.x[0]
-        self.steady_state.OBp = cells_steady_state.x[1]
-        self.steady_state.OCu = cells_steady_state.x[2]
-        self.steady_state.OCp = cells_steady_state.x[3]
-        print(f"Steady state calculated for porosity {porosity:.2f}: OBu={self.steady_state.OBu:}, "
-              f"OBp={self.steady_state.OBp:}, OBa={self.steady_state.OBa:}, "
-              f"OCu={self.steady_state.OCu:}, OCp={self.steady_state.OCp:}, "
-              f"OCa={self.steady_state.OCa:}, Turnover in % per day ={turnover:}")
+        cells_steady_state = self.calculate_steady_state_cells()
+        if cells_steady_state is None:
+            # fall back to the numerical root finder, e.g. for vanishing turnover. There the system is degenerate (OBu
+            # does not enter the equations when OCa = 0): Levenberg-Marquardt with tight tolerances stays at the initial
+            # guess, whereas the hybrid method or relaxed tolerances give non-physical roots (large OBu, negative OBp)
+            cells_steady_state = sc.optimize.root(self.bone_cell_population_model, self.initial_guess_root,
+                                                  tol=1e-15, options={'xtol': 1e-15}, method='lm').x
+        self.steady_state.OBu = cells_steady_state[0]
+        self.steady_state.OBp = cells_steady_state[1]
+        self.steady_state.OCu = cells_steady_state[2]
+        self.steady_state.OCp = cells_steady_state[3]
+        if self.verbose:
+            log.debug("Steady state calculated for porosity %.2f: OBu=%s, OBp=%s, OBa=%s, OCu=%s, OCp=%s, OCa=%s, "
+                      "Turnover in %% per day =%s", porosity, self.steady_state.OBu, self.steady_state.OBp,
+                      self.steady_state.OBa, self.steady_state.OCu, self.steady_state.OCp, self.steady_state.OCa,
+                      turnover)
         pass
 
-    def solve_bone_cell_population_model(self, tspan, porosity, initial_conditions=None):
+    def calculate_steady_state_cells(self):
+        """ Solves the steady-state equations for uncommitted and precursor cells in closed form, given the active cell
+        concentrations stored in the steady state. With OBa and OCa fixed, the signalling terms only depend on
+        already known concentrations, so the equations can be solved one after the other:
+        dOBa/dt = 0 gives OBp, dOBp/dt = 0 gives OBu, dOCa/dt = 0 gives OCp and dOCp/dt = 0 gives OCu.
+        The solution is checked by evaluating the residual of the steady-state system once (this also initialises the
+        steady-state strain energy density).
+
+        :return: steady-state values [OBu, OBp, OCu, OCp, vascular_pore_fraction, bone_volume_fraction] or None if the
+            closed-form solution does not exist (e.g. vanishing turnover)
+        :rtype: numpy.ndarray or None"""
+        OBa = self.steady_state.OBa
+        OCa = self.steady_state.OCa
+        try:
+            TGFb_repression_OBp = self.calculate_TGFb_repression_OBp(OCa, None)
+            OBp = self.parameters.apoptosis_rate.OBa * OBa / (self.parameters.differentiation_rate.OBp *
+                                                               TGFb_repression_OBp)
+            OBu = ((self.parameters.differentiation_rate.OBp * TGFb_repression_OBp -
+                    self.parameters.proliferation_rate.OBp) * OBp /
+                   (self.parameters.differentiation_rate.OBu * self.calculate_TGFb_activation_OBu(OCa, None)))
+            RANKL_activation_OCp = self.calculate_RANKL_activation_OCp(OBp, OBa, None)
+            OCp = (self.parameters.apoptosis_rate.OCa * OCa * self.calculate_TGFb_activation_OCa(OCa, None) /
+                   (self.parameters.differentiation_rate.OCp * RANKL_activation_OCp))
+            OCu = (self.parameters.differentiation_rate.OCp * OCp /
+                   (self.parameters.differentiation_rate.OCu * self.MCSF_activation_OCu))
+        except ZeroDivisionError:
+            return None
+        cells_steady_state = np.array([OBu, OBp, OCu, OCp, self.initial_guess_root[4], self.initial_guess_root[5]])
+        if not np.all(np.isfinite(cells_steady_state)):
+            return None
+        residual = self.bone_cell_population_model(cells_steady_state)
+        if not np.allclose(residual, 0, atol=1e-15):
+            return None
+        return cells_steady_state
+
+    def solve_bone_cell_population_model(self, tspan, porosity, initial_conditions=None, method='LSODA', t_eval=None):
         """ Solve the bone cell population model and volume fractions using the ODE system over a given time interval.
         The initial conditions are set to the steady-state values which are calculated if initial conditions are None.
         This function is overwritten from the source model to add vascular pore volume fraction and bone volume fraction,
@@ -277,22 +935,120 @@ class Lerebours_Model(Scheiner_Model):
         :type porosity: float
         :param initial_conditions: Initial conditions for the ODE system, if None, steady state is calculated
         :type initial_conditions: list or None
+        :param method: integration method of scipy.integrate.solve_ivp, the implicit methods ('LSODA', 'BDF', 'Radau')
+            use the analytic Jacobian :func:`_jac`
+        :type method: str
+        :param t_eval: times at which the solution is stored, if None every internal solver step is stored (more memory
+            for long simulations)
+        :type t_eval: numpy.ndarray or None
         :return: solution of the ODE system
         :rtype: scipy.integrate._ivp.ivp.OdeResult
         """
         if initial_conditions is None:
             self.calculate_steady_state(porosity)
-            x0 = np.array(
-                [self.steady_state.OBp, self.steady_state.OBa, self.steady_state.OCp, self.steady_state.OCa, porosity,
-                 1 - porosity])
+            x0 = self.steady_state_initial_conditions
+            x0[0] = self.steady_state.OBp
+            x0[1] = self.steady_state.OBa
+            x0[2] = self.steady_state.OCp
+            x0[3] = self.steady_state.OCa
+            x0[4] = porosity
+            x0[5] = 1 - porosity
         else:
             x0 = initial_conditions
-        solution = solve_ivp(lambda t, x: self.bone_cell_population_model(x, t), tspan, x0, rtol=1e-8, atol=1e-10,
-                             method='BDF', max_step=1)
+        params, steady_state, mechanical_state, mechanics_tensors, stress_vectors = self.pack_parameters()
+        solution = solve_ivp(lambda t, x: _rhs(x, t, params, steady_state, mechanical_state, mechanics_tensors,
+                                               stress_vectors), tspan, x0, rtol=1e-8, atol=1e-10,
+                             method=method, max_step=1, t_eval=t_eval,
+                             jac=lambda t, x: _jac(x, t, params, steady_state, mechanical_state, mechanics_tensors,
+                                                   stress_vectors))
+        self.unpack_mechanical_state(mechanical_state)
         if not solution.success:
-            print(f"Integration failed: {solution.message}")
+            log.warning(f"Integration failed: {solution.message}")
         return solution
 
+    def solve_porosity_batch(self, porosities, tspan, max_workers=None, t_eval=None):
+        """ Solves the bone cell population model for several porosities in parallel processes. The porosities are
+        independent, so each one is solved by a fresh model instance with the load case and specific surface
+        multiplier of this model and the default parameters (including its own steady state).
+
+        :param porosities: porosities of the bone ([0,1])
+        :type porosities: list or numpy.ndarray
+        :param tspan: time span for the ODE solver
+        :type tspan: numpy.ndarray with start and end time
+        :param max_workers: maximum number of worker processes, if None the number of processors is used
+        :type max_workers: int or None
+        :param t_eval: times at which the solutions are stored, if None every internal solver step is stored
+        :type t_eval: numpy.ndarray or None
+        :return: solutions of the ODE system in the order of the porosities
+        :rtype: list of scipy.integrate._ivp.ivp.OdeResult"""
+        number_of_porosities = len(porosities)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            solutions = list(executor.map(_solve_porosity, [self.load_case] * number_of_porosities, porosities,
+                                          [tspan] * number_of_porosities,
+                                          [self.specific_surface_multiplier] * number_of_porosities,
+                                          [t_eval] * number_of_porosities))
+        return solutions
+
+    def pack_parameters(self):
+        """ Packs the parameters, load case, steady state and mechanical constants needed in the transient ODE system
+        into a structured parameter record (``PARAMETER_DTYPE``) and flat numpy arrays, so that the right-hand side can
+        be evaluated by the compiled function :func:`_rhs` without Python attribute lookups. The scalar parameters are
+        copied in the layout of :meth:`Lerebours_Parameters.as_array` (``PARAM_DTYPE``), so parameters added there are
+        available in the record under the name ``group_attribute``. They are packed at the start of every solve, since
+        parameters (e.g. RANKL production) and stress tensors change between solves.
+
+        :return: parameter record, steady-state array [OBu, OCu, strain_energy_density], mechanical state array
+            [RANKL_production, strain_effect_on_OBp, strain_energy_density] followed by the cache key of the strain
+            energy density, 6x6 mechanics tensors and stress vectors for normal loading and the load case
+        :rtype: tuple of numpy.void and numpy.ndarray"""
+        parameters = self.parameters
+        self.calculate_constant_terms()
+        params = np.zeros(1, dtype=PARAMETER_DTYPE)
+        # the scalar parameters are the leading float64 fields of the record
+        params.view(np.float64)[:len(PARAM_DTYPE)] = parameters.as_array()
+        params['MCSF_activation_OCu'] = self.MCSF_activation_OCu
+        params['RANKL_RANK_binding'] = self.RANKL_RANK_binding
+        params['start_time'] = self.load_case.start_time
+        params['end_time'] = self.load_case.end_time
+        params['PTH_injection'] = self.load_case.PTH_injection
+        params['OPG_injection'] = self.load_case.OPG_injection
+        params['RANKL_injection'] = self.load_case.RANKL_injection
+        params['update_mechanical_effects'] = self.update_mechanical_effects
+
+        strain_energy_density_steady_state = parameters.mechanics.strain_energy_density_steady_state
+        steady_state = np.array([self.steady_state.OBu, self.steady_state.OCu,
+                                 np.nan if strain_energy_density_steady_state is None
+                                 else strain_energy_density_steady_state], dtype=float)
+        mechanical_state = np.array([parameters.mechanics.RANKL_production, 0.0, np.nan, np.nan, np.nan, -1.0],
+                                    dtype=float)
+
+        hill_tensor_cylindrical_inclusion = self.calculate_hill_tensor_cylindrical_inclusion()
+        unit_tensor = parameters.mechanics.unit_tensor_as_matrix
+        dilute_strain_concentration_vascular_pores = np.linalg.inv(
+            unit_tensor + hill_tensor_cylindrical_inclusion @ (parameters.mechanics.stiffness_tensor_vascular_pores -
+                                                              parameters.mechanics.stiffness_tensor_bone_matrix))
+        mechanics_tensors = np.array([unit_tensor, parameters.mechanics.stiffness_tensor_vascular_pores,
+                                      parameters.mechanics.stiffness_tensor_bone_matrix,
+                                      dilute_strain_concentration_vascular_pores], dtype=float)
+        stress_tensors = [parameters.mechanics.stress_tensor_normal_loading,
+                          parameters.mechanics.stress_tensor_normal_loading if self.load_case.stress_tensor is None
+                          else self.load_case.stress_tensor]
+        stress_vectors = np.array([[stress[0, 0], stress[1, 1], stress[2, 2], 2 * stress[0, 1], 2 * stress[1, 2],
+                                    2 * stress[2, 0]] for stress in stress_tensors], dtype=float)
+        return params[0], steady_state, mechanical_state, mechanics_tensors, stress_vectors
+
+    def unpack_mechanical_state(self, mechanical_state):
+        """ Stores the mechanical state written by the compiled right-hand side :func:`_rhs` on the model and
+        parameters, where the Python implementation of the mechanical feedback keeps it.
+
+        :param mechanical_state: mechanical state [RANKL_production, strain_effect_on_OBp, strain_energy_density]
+        :type mechanical_state: numpy.ndarray
+        :return: None"""
+        self.parameters.mechanics.RANKL_production = mechanical_state[MECHANICS_RANKL_production]
+        self.strain_effect_on_OBp = mechanical_state[MECHANICS_strain_effect_on_OBp]
+        if not np.isnan(mechanical_state[MECHANICS_strain_energy_density]):
+            self.strain_energy_density = mechanical_state[MECHANICS_strain_energy_density]
+
     def apply_mechanical_effects(self, OBp, OBa, OCa, vascular_pore_fraction, bone_volume_fraction, t):
         """ Computes the mechanical stimulus-driven change in osteoblast precursor (OBp) proliferation.
 
@@ -318,13 +1074,11 @@ class Lerebours_Model(Scheiner_Model):
         strain_effect_on_OBp = self.calculate_strain_effect_on_OBp(OBa, OCa, vascular_pore_fraction,
                                                                       bone_volume_fraction, t)
         self.strain_effect_on_OBp = strain_effect_on_OBp
-        if strain_effect_on_OBp <= 0:
-            return self.parameters.proliferation_rate.OBp * OBp
-        elif 0 < strain_effect_on_OBp < 1 / self.parameters.mechanics.biomech_transduction_strength:
-            return self.parameters.proliferation_rate.OBp * (
-                    1 + self.parameters.mechanics.biomech_transduction_strength * strain_effect_on_OBp) * OBp
-        else:
-            return 2 * self.parameters.proliferation_rate.OBp * OBp
+        # the piecewise function is evaluated as a clipped linear factor between 1 (no or negative stimulus) and 2
+        # (saturated stimulus)
+        proliferation_factor = min(max(1 + self.parameters.mechanics.biomech_transduction_strength *
+                                       strain_effect_on_OBp, 1), 2)
+        return self.parameters.proliferation_rate.OBp * proliferation_factor * OBp
 
     def calculate_strain_effect_on_OBp(self, OBa, OCa, vascular_pore_fraction, bone_volume_fraction, t):
         """
@@ -371,7 +1125,9 @@ class Lerebours_Model(Scheiner_Model):
 
     def set_macroscopic_stress_tensor(self, stress_xx, stress_xy, stress_xz, steady_state=False):
         """
-        Sets the macroscopic stress tensor and updates the model or load case parameters.
+        Sets the macroscopic stress tensor and updates the model or load case parameters. The stress tensors are
+        written into tensors preallocated per model instance (one for normal loading and one for the load case), so no
+        new arrays are created when the stress is updated repeatedly, e.g. in the spatial model.
 
         .. note::
            **Coordinate System Convention**: To maintain compatibility between the Scheiner
@@ -389,12 +1145,11 @@ class Lerebours_Model(Scheiner_Model):
         :type steady_state: bool
         :return: None
         """
-        stress_tensor = np.zeros((3, 3))
+        # the preallocated tensors only ever have these five entries set, all other entries stay zero
+        stress_tensor = self.stress_tensor_normal_loading if steady_state else self.stress_tensor_load_case
         stress_tensor[2, 2] = stress_xx
-        stress_tensor[0, 2] = stress_xz
-        stress_tensor[2, 0] = stress_xz
-        stress_tensor[1, 2] = stress_xy
-        stress_tensor[2, 1] = stress_xy
+        stress_tensor[0, 2] = stress_tensor[2, 0] = stress_xz
+        stress_tensor[1, 2] = stress_tensor[2, 1] = stress_xy
         if steady_state:
             self.parameters.mechanics.stress_tensor_normal_loading = stress_tensor
         else:
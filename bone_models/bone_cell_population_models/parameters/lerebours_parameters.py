@@ -1,7 +1,57 @@
-import numpy as np
+import math
+from dataclasses import dataclass, field
+from enum import IntFlag
+from operator import attrgetter
+from typing import NamedTuple, Optional
 
+import numpy as np
 
-class differentiation_rate:
+# The constant mechanics tensors are built once and shared (read-only) by every parameter instance.
+UNIT_TENSOR_AS_MATRIX = np.eye(6, dtype=np.float64)
+UNIT_TENSOR_AS_MATRIX.setflags(write=False)
+# the vascular pore stiffness is the rank-1 tensor 2.3 * e e^T with e = [1, 1, 1, 0, 0, 0], so c_vas @ x can also be
+# evaluated as factor * (factor @ x) with factor = sqrt(2.3) * e
+_volumetric_direction = np.array([1, 1, 1, 0, 0, 0], dtype=np.float64)
+STIFFNESS_TENSOR_VASCULAR_PORES = 2.3 * np.outer(_volumetric_direction, _volumetric_direction)
+STIFFNESS_TENSOR_VASCULAR_PORES.setflags(write=False)
+STIFFNESS_TENSOR_VASCULAR_PORES_FACTOR = math.sqrt(2.3) * _volumetric_direction
+STIFFNESS_TENSOR_VASCULAR_PORES_FACTOR.setflags(write=False)
+STIFFNESS_TENSOR_BONE_MATRIX = np.array([[18.5, 10.3, 10.4, 0, 0, 0],
+                                         [10.3, 20.8, 11.0, 0, 0, 0],
+                                         [10.4, 11.0, 28.4, 0, 0, 0],
+                                         [0, 0, 0, 12.9, 0, 0],
+                                         [0, 0, 0, 0, 11.5, 0],
+                                         [0, 0, 0, 0, 0, 9.3]], dtype=np.float64)
+STIFFNESS_TENSOR_BONE_MATRIX.setflags(write=False)
+STRESS_TENSOR_NORMAL_LOADING = np.array([[0, 0, 0], [0, 0, 0], [0, 0, -0.03]], dtype=np.float64)  # [GPa]
+STRESS_TENSOR_NORMAL_LOADING.setflags(write=False)
+STEP_SIZE_FOR_HILL_TENSOR_INTEGRATION = math.tau / 50
+
+# scalar parameters in the order in which Lerebours_Parameters.as_array packs them (mechanics state such as the
+# RANKL production and the steady-state strain quantities is set by the model and therefore not included)
+PARAM_ORDER = ('differentiation_rate.OBu', 'differentiation_rate.OBp', 'differentiation_rate.OCp',
+               'differentiation_rate.OCu', 'apoptosis_rate.OBa', 'apoptosis_rate.OCa',
+               'activation_coefficient.TGFb_OBu', 'activation_coefficient.TGFb_OCa', 'activation_coefficient.PTH_OB',
+               'activation_coefficient.RANKL_RANK', 'activation_coefficient.MCSF_OCu',
+               'repression_coefficient.TGFb_OBp', 'repression_coefficient.PTH_OB', 'degradation_rate.PTH',
+               'degradation_rate.OPG', 'degradation_rate.RANKL', 'degradation_rate.TGFb', 'concentration.OPG_max',
+               'concentration.MCSF', 'concentration.RANK', 'binding_constant.RANKL_OPG', 'binding_constant.RANKL_RANK',
+               'production_rate.intrinsic_PTH', 'production_rate.intrinsic_RANKL', 'production_rate.min_OPG_per_cell',
+               'production_rate.bool_OBp_produce_OPG', 'production_rate.bool_OBa_produce_OPG',
+               'production_rate.max_RANKL_per_cell', 'production_rate.max_RANK_per_cell',
+               'production_rate.bool_OBp_produce_RANKL', 'production_rate.bool_OBa_produce_RANKL',
+               'mechanics.step_size_for_Hill_tensor_integration', 'mechanics.biomech_transduction_strength',
+               'mechanics.biomech_transduction_strength_RANKL', 'mechanics.correction_factor',
+               'proliferation_rate.OBp', 'bone_volume.formation_rate', 'bone_volume.resorption_rate',
+               'bone_volume.stored_TGFb_content', 'calibration.turnover', 'calibration.steady_state_turnover',
+               'calibration.OCa', 'calibration.OBa')
+PARAM_GETTERS = tuple(attrgetter(name) for name in PARAM_ORDER)
+# structured record of the same scalar parameters, fields named group_attribute (see Lerebours_Parameters.to_record);
+# the parameter record of the compiled Lerebours ODE system starts with these fields (see models.lerebours_model)
+PARAM_DTYPE = np.dtype([(name.replace('.', '_'), np.float64) for name in PARAM_ORDER])
+
+
+class differentiation_rate(NamedTuple):
     """ This class defines the differentiation rates of the different cell types.
 
     The following table provides a mapping between the model parameters
@@ -28,14 +78,13 @@ class differentiation_rate:
     :param OCu: differentiation rate of uncommitted osteoclasts
     :type OCu: float """
 
-    def __init__(self):
-        self.OBu = 0.7
-        self.OBp = 0.165696312976030
-        self.OCp = 2.1
-        self.OCu = 0.42
+    OBu: float = 0.7
+    OBp: float = 0.165696312976030
+    OCp: float = 2.1
+    OCu: float = 0.42
 
 
-class apoptosis_rate:
+class apoptosis_rate(NamedTuple):
     """ This class defines the apoptosis rates of the different cell types.
 
     The following table provides a mapping between the model parameters
@@ -53,12 +102,11 @@ class apoptosis_rate:
     :type OBa: float
     :param OCa: apoptosis rate of active osteoclasts
     :type OCa: float """
-    def __init__(self):
-        self.OBa = 0.211072625806496
-        self.OCa = 5.64874468409633
+    OBa: float = 0.211072625806496
+    OCa: float = 5.64874468409633
 
 
-class proliferation_rate:
+class proliferation_rate(NamedTuple):
     """ This class defines the proliferation rates. The proliferation rate of OBp depends the mechanics effect and is
     thus computed in the model (Eq. (22) in the paper).
 
@@ -74,9 +122,10 @@ class proliferation_rate:
     :param OBp: proliferation rate of precursor osteoblasts
     :type OBp: float
     """
-    def __init__(self):
-        self.OBp = 3.5e-3
+    OBp: float = 3.5e-3
 
+
+@dataclass(slots=True, eq=False)
 class activation_coefficient:
     """ This class defines the activation coefficients of respective receptor-ligand binding.
 
@@ -107,15 +156,14 @@ class activation_coefficient:
     :type RANKL_RANK: float
     :param MCSF_OCu: parameter for MCSF binding on OCu
     :type MCSF_OCu: float"""
-    def __init__(self):
-        self.TGFb_OBu = 0.000563278809675429
-        self.TGFb_OCa = 0.000563278809675429
-        self.PTH_OB = 150
-        self.RANKL_RANK = 16.65
-        self.MCSF_OCu = 0.001
+    TGFb_OBu: float = 0.000563278809675429
+    TGFb_OCa: float = 0.000563278809675429
+    PTH_OB: float = 150
+    RANKL_RANK: float = 16.65
+    MCSF_OCu: float = 0.001
 
 
-class repression_coefficient:
+class repression_coefficient(NamedTuple):
     """ This class defines the repression coefficients of respective receptor-ligand binding.
 
     The following table provides a mapping between the model parameters
@@ -133,11 +181,11 @@ class repression_coefficient:
     :type TGFb_OBp: float
     :param PTH_OB: parameter for PTH binding on osteoblasts (repressor)
     :type PTH_OB: float"""
-    def __init__(self):
-        self.TGFb_OBp = 0.00189
-        self.PTH_OB = 0.222581427709954
+    TGFb_OBp: float = 0.00189
+    PTH_OB: float = 0.222581427709954
 
 
+@dataclass(slots=True, eq=False)
 class degradation_rate:
     r""" This class defines the degradation rates of the different factors.
 
@@ -164,14 +212,13 @@ class degradation_rate:
     :type RANKL: float
     :param TGFb: degradation rate of TGF-beta
     :type TGFb: float"""
-    def __init__(self):
-        self.PTH = 86
-        self.OPG = 3.50e-1
-        self.RANKL = 1.0132471014805027e+1
-        self.TGFb = 2
+    PTH: float = 86
+    OPG: float = 3.50e-1
+    RANKL: float = 1.0132471014805027e+1
+    TGFb: float = 2
 
 
-class concentration:
+class concentration(NamedTuple):
     """ This class defines fixed concentrations.
 
     The following table provides a mapping between the model parameters
@@ -194,12 +241,12 @@ class concentration:
     :param RANK: concentration of RANK
     :type RANK: float
     """
-    def __init__(self):
-        self.OPG_max = 2.00e+8
-        self.MCSF = 0.001
-        self.RANK = 1.00e+1
+    OPG_max: float = 2.00e+8
+    MCSF: float = 0.001
+    RANK: float = 1.00e+1
+
 
-class binding_constant:
+class binding_constant(NamedTuple):
     """ This class defines the binding constants of RANK RANKL and OPG.
 
     The following table provides a mapping between the model parameters
@@ -217,10 +264,34 @@ class binding_constant:
     :type RANKL_OPG: float
     :param RANKL_RANK: binding constant for RANKL-RANK
     :type RANKL_RANK: float"""
-    def __init__(self):
-        self.RANKL_OPG = 1.00e-3
-        self.RANKL_RANK = 3.411764705882353e-002
+    RANKL_OPG: float = 1.00e-3
+    RANKL_RANK: float = 3.411764705882353e-002
+
+
+class Sources(IntFlag):
+    """ Flags determining which osteoblasts produce OPG and RANKL (see :class:`production_rate`). """
+    OBp_OPG = 1
+    OBa_OPG = 2
+    OBp_RANKL = 4
+    OBa_RANKL = 8
+
+
+def _source_property(flag):
+    """ Creates a boolean property that reads and sets ``flag`` in the ``sources`` of a :class:`production_rate`.
 
+    :param flag: flag the property refers to
+    :type flag: Sources
+    :return: property for the flag
+    :rtype: property"""
+    def getter(self):
+        return bool(self.sources & flag)
+
+    def setter(self, value):
+        self.sources = self.sources | flag if value else self.sources & ~flag
+    return property(getter, setter)
+
+
+@dataclass(slots=True, eq=False)
 class production_rate:
     r""" This class defines the intrinsic/ endogenous production rates of the different factors.
 
@@ -256,30 +327,34 @@ class production_rate:
     :param min_OPG_per_cell: minimal rate of OPG production per cell
     :type min_OPG_per_cell: float
     :param bool_OBp_produce_OPG: boolean variable determining which cells produce OPG
-    :type bool_OBp_produce_OPG: int
+    :type bool_OBp_produce_OPG: bool
     :param bool_OBa_produce_OPG: boolean variable determining which cells produce OPG
-    :type bool_OBa_produce_OPG: int
+    :type bool_OBa_produce_OPG: bool
     :param max_RANKL_per_cell: production rate of RANKL per cell
     :type max_RANKL_per_cell: float
     :param max_RANK_per_cell: production rate of RANK per cell
     :type max_RANK_per_cell: float
     :param bool_OBp_produce_RANKL: boolean variable determining which cells produce RANKL
-    :type bool_OBp_produce_RANKL: int
+    :type bool_OBp_produce_RANKL: bool
     :param bool_OBa_produce_RANKL: boolean variable determining which cells produce RANKL
-    :type bool_OBa_produce_RANKL: int
+    :type bool_OBa_produce_RANKL: bool
+    :param sources: cells producing OPG and RANKL, the bool_* variables are views of these flags
+    :type sources: Sources
     """
-    def __init__(self):
-        self.intrinsic_PTH = 2.907
-        self.intrinsic_RANKL = 1.684195714712206e+5
-        self.min_OPG_per_cell = 1.624900337835679e+008
-        self.bool_OBp_produce_OPG = 0
-        self.bool_OBa_produce_OPG = 1
-        self.max_RANKL_per_cell = 27e+5
-        self.max_RANK_per_cell = 1.000e+004
-        self.bool_OBp_produce_RANKL = 1  # 1=yes
-        self.bool_OBa_produce_RANKL = 0  # 0=no
+    intrinsic_PTH: float = 2.907
+    intrinsic_RANKL: float = 1.684195714712206e+5
+    min_OPG_per_cell: float = 1.624900337835679e+008
+    max_RANKL_per_cell: float = 27e+5
+    max_RANK_per_cell: float = 1.000e+004
+    sources: Sources = Sources.OBa_OPG | Sources.OBp_RANKL
+
+    bool_OBp_produce_OPG = _source_property(Sources.OBp_OPG)
+    bool_OBa_produce_OPG = _source_property(Sources.OBa_OPG)
+    bool_OBp_produce_RANKL = _source_property(Sources.OBp_RANKL)
+    bool_OBa_produce_RANKL = _source_property(Sources.OBa_RANKL)
 
 
+@dataclass(slots=True, eq=False)
 class bone_volume:
     r""" This class defines the parameters relevant for bone volume of the bone model.
 
@@ -302,12 +377,12 @@ class bone_volume:
     :type resorption_rate: float
     :param stored_TGFb_content: proportionality constant expressing the TGF-β content stored in bone volume
     :type stored_TGFb_content: float """
-    def __init__(self):
-        self.formation_rate = 40.0
-        self.resorption_rate = 200.0
-        self.stored_TGFb_content = 0.01
+    formation_rate: float = 40.0
+    resorption_rate: float = 200.0
+    stored_TGFb_content: float = 0.01
 
 
+@dataclass(slots=True, eq=False)
 class mechanics:
     r""" This class defines the parameters relevant for mechanics of the bone model.
 
@@ -348,37 +423,22 @@ class mechanics:
     | correction_factor                   |:math:`K`                             |  GPa    |
     +-------------------------------------+--------------------------------------+---------+
     """
-    def __init__(self):
-        self.strain_effect_on_OBp_steady_state = None
-        self.strain_energy_density_steady_state = None
-        self.update_OBp_proliferation_rate = True
-        self.RANKL_production = 0
-        self.unit_tensor_as_matrix = np.array([[1, 0, 0, 0, 0, 0],
-                                               [0, 1, 0, 0, 0, 0],
-                                               [0, 0, 1, 0, 0, 0],
-                                               [0, 0, 0, 1, 0, 0],
-                                               [0, 0, 0, 0, 1, 0],
-                                               [0, 0, 0, 0, 0, 1]])
-        self.stiffness_tensor_vascular_pores = np.array([[1, 1, 1, 0, 0, 0],
-                                                       [1, 1, 1, 0, 0, 0],
-                                                       [1, 1, 1, 0, 0, 0],
-                                                       [0, 0, 0, 0, 0, 0],
-                                                       [0, 0, 0, 0, 0, 0],
-                                                       [0, 0, 0, 0, 0, 0]]) * 2.3
-        self.stiffness_tensor_bone_matrix = np.array([[18.5, 10.3, 10.4, 0, 0, 0],
-                                                    [10.3, 20.8, 11.0, 0, 0, 0],
-                                                    [10.4, 11.0, 28.4, 0, 0, 0],
-                                                    [0, 0, 0, 12.9, 0, 0],
-                                                    [0, 0, 0, 0, 11.5, 0],
-                                                    [0, 0, 0, 0, 0, 9.3]])
-        self.step_size_for_Hill_tensor_integration = 2 * np.pi / 50
-        self.hill_tensor_cylindrical_inclusion = None
-        self.stress_tensor_normal_loading = np.array([[0, 0, 0], [0, 0, 0], [0, 0, -30]]) * (10 ** -3)
-        self.biomech_transduction_strength = 0.5
-        self.biomech_transduction_strength_RANKL = 18
-        self.correction_factor = 1.0e-6
-
-
+    strain_effect_on_OBp_steady_state: Optional[float] = None
+    strain_energy_density_steady_state: Optional[float] = None
+    update_OBp_proliferation_rate: bool = True
+    RANKL_production: float = 0
+    unit_tensor_as_matrix: np.ndarray = field(default_factory=lambda: UNIT_TENSOR_AS_MATRIX)
+    stiffness_tensor_vascular_pores: np.ndarray = field(default_factory=lambda: STIFFNESS_TENSOR_VASCULAR_PORES)
+    stiffness_tensor_bone_matrix: np.ndarray = field(default_factory=lambda: STIFFNESS_TENSOR_BONE_MATRIX)
+    step_size_for_Hill_tensor_integration: float = STEP_SIZE_FOR_HILL_TENSOR_INTEGRATION
+    hill_tensor_cylindrical_inclusion: Optional[np.ndarray] = None
+    stress_tensor_normal_loading: np.ndarray = field(default_factory=lambda: STRESS_TENSOR_NORMAL_LOADING)
+    biomech_transduction_strength: float = 0.5
+    biomech_transduction_strength_RANKL: float = 18
+    correction_factor: float = 1.0e-6
+
+
+@dataclass(slots=True, eq=False)
 class calibration:
     r""" This class defines the parameters relevant for calibration of the bone model.
     The following table provides a mapping between the model parameters and the original names from the publication:
@@ -404,18 +464,22 @@ class calibration:
     :param OBa: calibration coefficient for OBa of the bone model
     :type OBa: float
     """
-    def __init__(self):
-        # not stated
-        # self.turnover = 0.00395
-        self.turnover = 5.961e-03
-        self.steady_state_turnover = 0.395
-        self.OCa = 0.09
-        self.OBa = 1.132
+    # not stated
+    # turnover: float = 0.00395
+    turnover: float = 5.961e-03
+    steady_state_turnover: float = 0.395
+    OCa: float = 0.09
+    OBa: float = 1.132
 
 
+@dataclass(slots=True, eq=False)
 class Lerebours_Parameters:
     """ This class defines the parameters of the bone model.
 
+    The groups that are not modified by the model (differentiation, apoptosis and proliferation rates, repression
+    coefficients, concentrations and binding constants) are named tuples; to change one of their values, replace the
+    group, e.g. ``parameters.differentiation_rate = parameters.differentiation_rate._replace(OCp=4.2)``.
+
     :param differentiation_rate: differentiation rates of the different cell types
     :type differentiation_rate: differentiation_rate
     :param apoptosis_rate: apoptosis rates of the different cell types
@@ -441,16 +505,58 @@ class Lerebours_Parameters:
     :param calibration: parameters relevant for calibration of the bone model
     :type calibration: calibration
     """
-    def __init__(self):
-        self.differentiation_rate = differentiation_rate()
-        self.apoptosis_rate = apoptosis_rate()
-        self.activation_coefficient = activation_coefficient()
-        self.repression_coefficient = repression_coefficient()
-        self.degradation_rate = degradation_rate()
-        self.concentration = concentration()
-        self.binding_constant = binding_constant()
-        self.production_rate = production_rate()
-        self.mechanics = mechanics()
-        self.proliferation_rate = proliferation_rate()
-        self.bone_volume = bone_volume()
-        self.calibration = calibration()
+    differentiation_rate: differentiation_rate = field(default_factory=differentiation_rate)
+    apoptosis_rate: apoptosis_rate = field(default_factory=apoptosis_rate)
+    activation_coefficient: activation_coefficient = field(default_factory=activation_coefficient)
+    repression_coefficient: repression_coefficient = field(default_factory=repression_coefficient)
+    degradation_rate: degradation_rate = field(default_factory=degradation_rate)
+    concentration: concentration = field(default_factory=concentration)
+    binding_constant: binding_constant = field(default_factory=binding_constant)
+    production_rate: production_rate = field(default_factory=production_rate)
+    mechanics: mechanics = field(default_factory=mechanics)
+    proliferation_rate: proliferation_rate = field(default_factory=proliferation_rate)
+    bone_volume: bone_volume = field(default_factory=bone_volume)
+    calibration: calibration = field(default_factory=calibration)
+
+    def as_array(self):
+        """ Packs all scalar parameters into a contiguous float64 array in the order given by ``PARAM_ORDER``, so that
+        compiled code can index them by constant offset instead of walking the parameter groups.
+
+        The array is a snapshot: it is rebuilt on every call, since the models modify parameters (e.g. the resorption
+        rate or the OBp proliferation rate) after construction.
+
+        :return: scalar parameters in the order of ``PARAM_ORDER``
+        :rtype: numpy.ndarray"""
+        return np.fromiter((getter(self) for getter in PARAM_GETTERS), dtype=np.float64, count=len(PARAM_GETTERS))
+
+    def to_record(self):
+        """ Packs all scalar parameters into a structured record of type ``PARAM_DTYPE`` (fields named
+        ``group_attribute``, e.g. ``differentiation_rate_OBu``), which can be passed to and read by name in
+        numba-compiled functions. Like :meth:`as_array`, the record is a snapshot that is rebuilt on every call.
+
+        :return: scalar parameters as a structured record
+        :rtype: numpy.void"""
+        return self.as_array().view(PARAM_DTYPE)[0]
+
+    def cache_key(self):
+        """ Returns a hashable snapshot of the parameter values, so that results depending on the parameters can be
+        cached (e.g. with ``functools.lru_cache``) by value: two parameter sets with equal values have equal keys.
+        It consists of the scalar parameters in the order of ``PARAM_ORDER``, the mechanical state set by the models
+        (steady-state strain effect and strain energy density, RANKL production, OBp proliferation flag; NaN if not
+        set yet) and the bytes of all mechanics tensors (None for a Hill tensor that is not calculated yet).
+
+        The parameter classes themselves keep identity-based equality and hashing, since the models modify them after
+        construction. The key must therefore be taken again after every change.
+
+        :return: hashable snapshot of the parameter values
+        :rtype: tuple"""
+        mechanics = self.mechanics
+        mechanical_state = tuple(np.nan if value is None else float(value) for value in (
+            mechanics.strain_effect_on_OBp_steady_state, mechanics.strain_energy_density_steady_state,
+            mechanics.RANKL_production, mechanics.update_OBp_proliferation_rate))
+        tensors = tuple(None if tensor is None else np.asarray(tensor, dtype=np.float64).tobytes() for tensor in (
+            mechanics.unit_tensor_as_matrix, mechanics.stiffness_tensor_vascular_pores,
+            mechanics.stiffness_tensor_bone_matrix, mechanics.hill_tensor_cylindrical_inclusion,
+            mechanics.stress_tensor_normal_loading))
+        return tuple(self.as_array().tolist()) + mechanical_state + tensors
+
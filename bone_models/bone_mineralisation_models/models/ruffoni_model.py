@@ -1,8 +1,8 @@
 import numpy as np
 import fipy as fp
 from bone_models.bone_mineralisation_models.parameters.ruffoni_parameters import Ruffoni_Parameters
-import matplotlib.pyplot as plt
 import logging
+from numba import njit, prange
 import scipy as sc
 from scipy.stats import skewnorm
 from scipy.interpolate import PchipInterpolator
@@ -14,6 +14,45 @@ console.setLevel(logging.INFO)
 log.addHandler(console)
 
 
+@njit(cache=True, fastmath=True)
+def _bone_volume(BMDD_values, dx):
+    """ Compiled version of :meth:`Ruffoni_Model.calculate_bone_volume` for the uniform calcium mesh.
+
+    :param BMDD_values: BMDD values at the cell centers
+    :type BMDD_values: numpy.ndarray
+    :param dx: cell width of the calcium mesh
+    :type dx: float
+    :return: total bone volume
+    :rtype: float"""
+    bone_volume = 0.0
+    for value in BMDD_values:
+        bone_volume += value
+    return bone_volume * dx
+
+
+@njit(cache=True, fastmath=True, parallel=True)
+def _double_hyperbolic_mineralization_law(time_values, coefficients):
+    """ Compiled version of :meth:`Ruffoni_Model.initialize_double_hyperbolic_mineralization_law`, evaluated in a
+    single parallel pass over the time values.
+
+    :param time_values: time values at which the mineralization law is evaluated
+    :type time_values: numpy.ndarray
+    :param coefficients: primary mineral content, secondary mineral increment, primary and secondary apposition rate
+    :type coefficients: Mineralization_Law_Coefficients
+    :return: calcium content values
+    :rtype: numpy.ndarray"""
+    primary_mineral_content = coefficients.primary_mineral_content
+    secondary_mineral_increment = coefficients.secondary_mineral_increment
+    primary_apposition_rate = coefficients.primary_apposition_rate
+    secondary_apposition_rate = coefficients.secondary_apposition_rate
+    calcium_values = np.empty_like(time_values)
+    for i in prange(time_values.shape[0]):
+        t = time_values[i]
+        calcium_values[i] = (primary_mineral_content * t / (primary_apposition_rate + t) +
+                             secondary_mineral_increment * t / (secondary_apposition_rate + t))
+    return calcium_values
+
+
 class Ruffoni_Model:
     r"""
     Implements the Ruffoni et al. (2007) model for Bone Mineralization Density Distribution (BMDD) using FiPy's Finite Volume Method for robust PDE solving.
@@ -78,14 +117,17 @@ class Ruffoni_Model:
             self.parameters = Ruffoni_Parameters()
         self.simulation_time = simulation_time
         self.nx = number_of_grid_points
-        self.mesh = fp.Grid1D(dx=(
-                                         self.parameters.calcium.maximum_content - self.parameters.calcium.minimum_content) / number_of_grid_points,
-                              nx=number_of_grid_points)
+        # uniform cell width of the calcium mesh, reused for the integrals over the BMDD
+        self.dx = (self.parameters.calcium.maximum_content -
+                   self.parameters.calcium.minimum_content) / number_of_grid_points
+        self.mesh = fp.Grid1D(dx=self.dx, nx=number_of_grid_points)
         self.mesh = self.mesh + self.parameters.calcium.minimum_content
         self.BMDD = fp.CellVariable(name="BMDD", mesh=self.mesh, hasOld=True)
         self.mineralization_law = None  # Will be initialized later
         self.inverse_mineralization_law = None  # Will be initialized later
         self.mineralization_velocity = None  # Will be initialized later
+        self.mineralization_velocity_cells = None  # Will be initialized later
+        self.mineralization_velocity_at_minimum = None  # Will be initialized later
         self.start = start
 
     def initialize_model(self):
@@ -137,60 +179,84 @@ class Ruffoni_Model:
         -----
         - The velocity field is defined as a **face variable** because it represents BMDD flux
           across cell boundaries.
-        - The resorption coefficient is a **cell variable** since it is a local property.
+        - The resorption coefficient is a scalar **variable**, as the resorption rate is the same for all calcium
+          contents. A calcium dependent rate requires a **cell variable** instead.
         - The adaptive solver halves the time step until the desired residual is achieved,
-          or terminates if the minimum time step is reached.
+          or terminates if the minimum time step is reached. Time is advanced by the time step of the last sweep,
+          and the next step starts from 1.5 times that value (capped at the initial time step).
         """
 
         self.initialize_model()
 
-        BMDD_evolution = [self.BMDD.value.copy()]
-        BV_evolution = [self.calculate_bone_volume()]
-        time_points = [0.0]
-
         velocity_field = fp.FaceVariable(mesh=self.mesh, rank=1)
-        resorption_coeff = fp.CellVariable(mesh=self.mesh)
+        resorption_rate = self.calculate_resorption_rate(0.0)
+        # the resorption rate does not depend on the calcium content, so a scalar coefficient is sufficient
+        resorption_coeff = fp.Variable(value=resorption_rate)
         equation = (
                 fp.TransientTerm(var=self.BMDD)
                 + fp.ConvectionTerm(coeff=velocity_field, var=self.BMDD)
                 + fp.ImplicitSourceTerm(coeff=resorption_coeff, var=self.BMDD)
         )
         self.BMDD.faceGrad.constrain([0], self.mesh.facesRight)
+        # the constraint on the left boundary is only added once, its value is updated when the formation rate changes
+        formation_rate = self.calculate_formation_rate(0.0)
+        BMDD_at_zero_calcium = fp.Variable(value=formation_rate / self.mineralization_velocity_at_minimum)
+        self.BMDD.constrain(BMDD_at_zero_calcium, self.mesh.facesLeft)
         # Start time loop
         time = 0.0
         last_save_time = 0.0
         initial_time_step = 1.0e-2
         desired_residual = 1.0e-1  # Desired residual for convergence
         minimum_time_step = 1.0e-4  # Minimum time step to avoid too small dt
-        vel_cells = [self.mineralization_velocity(c)
-                     for c in self.mesh.cellCenters[0].value]
-        velocity_field.setValue([[fp.CellVariable(mesh=self.mesh, value=vel_cells).faceValue]])
+        time_step = initial_time_step
+        # saves are at least save_interval apart and the last one is at most one time step past the end
+        number_of_saves = int((self.simulation_time + initial_time_step) / save_interval) + 2
+        BMDD_evolution = np.empty((number_of_saves, self.nx))
+        BV_evolution = np.empty(number_of_saves)
+        time_points = np.empty(number_of_saves)
+        BMDD_evolution[0] = self.BMDD.value
+        BV_evolution[0] = self.calculate_bone_volume()
+        time_points[0] = 0.0
+        save_index = 1
+        # face velocities as the arithmetic mean of the neighbouring cells, boundary faces take the adjacent cell value
+        velocity_cells = self.mineralization_velocity_cells
+        velocity_field.setValue(np.concatenate(([velocity_cells[0]],
+                                                0.5 * (velocity_cells[:-1] + velocity_cells[1:]),
+                                                [velocity_cells[-1]]))[np.newaxis])
         while time < self.simulation_time:
             residual = 1.0  # Initial residual to enter the loop
             # Update values for this time step
             self.BMDD.updateOld()
-            resorption_coeff.setValue(self.calculate_resorption_rate(time))
-            BMDD_at_zero_calcium = (
-                    self.calculate_formation_rate(time) /
-                    self.mineralization_velocity(self.parameters.calcium.minimum_content)
-            )
-            self.BMDD.constrain(BMDD_at_zero_calcium, self.mesh.facesLeft)
+            # the coefficient is overwritten in place, and only when the resorption rate changes
+            current_resorption_rate = self.calculate_resorption_rate(time)
+            if current_resorption_rate != resorption_rate:
+                resorption_rate = current_resorption_rate
+                resorption_coeff.setValue(resorption_rate)
+            current_formation_rate = self.calculate_formation_rate(time)
+            if current_formation_rate != formation_rate:
+                formation_rate = current_formation_rate
+                BMDD_at_zero_calcium.setValue(formation_rate / self.mineralization_velocity_at_minimum)
             # Use sweep method to solve the PDE with constraint on residual
-            dt = initial_time_step
+            dt = time_step
             while residual > desired_residual:
                 residual = equation.sweep(var=self.BMDD, dt=dt)
-                dt = dt / 2
-                if dt < minimum_time_step:
+                if residual <= desired_residual:
+                    break
+                if dt / 2 < minimum_time_step:
                     log.warning("Time step too small, stopping iteration.")
                     break
+                dt = dt / 2
+            # advance by the time step of the last sweep and let it grow again in the next step
             time += dt
+            time_step = min(1.5 * dt, initial_time_step)
             # Save results
             if time - last_save_time >= save_interval:
-                BMDD_evolution.append(self.BMDD.value.copy())
-                BV_evolution.append(self.calculate_bone_volume())
-                time_points.append(time)
+                BMDD_evolution[save_index] = self.BMDD.value
+                BV_evolution[save_index] = self.calculate_bone_volume()
+                time_points[save_index] = time
+                save_index += 1
                 last_save_time = time
-        return np.array(BMDD_evolution), np.array(BV_evolution), np.array(time_points)
+        return BMDD_evolution[:save_index], BV_evolution[:save_index], time_points[:save_index]
 
     def check_mass_conservation(self, formation_rate, resorption_rate, bone_volume):
         """ This function checks the mass conservation in PDE solving - should be close to zero for equilibrium.
@@ -205,9 +271,9 @@ class Ruffoni_Model:
         :rtype: float"""
 
         total_formation = formation_rate
-        print(f"Formed Bone Volume: {total_formation:.8f} [microm^3/time step]")
+        log.debug("Formed Bone Volume: %.8f [microm^3/time step]", total_formation)
         total_resorption = resorption_rate * bone_volume
-        print(f"Resorbed Bone Volume: {total_resorption:.8f} [microm^3/time step]")
+        log.debug("Resorbed Bone Volume: %.8f [microm^3/time step]", total_resorption)
         change_in_bone_volume = total_formation - total_resorption
         return change_in_bone_volume
 
@@ -234,8 +300,8 @@ class Ruffoni_Model:
             raise ValueError("Invalid start parameter. Use 'BMDD' or 'mineralization law'.")
         self.BMDD.setValue(initial_BMDD)
         # For equilibrium: formation_rate = resorption_rate * bone_volume
-        calcium_values = self.mesh.cellCenters[0].value
-        bone_volume = np.trapz(initial_BMDD, calcium_values)
+        # trapezoidal rule over the cell centers, written out for the uniform mesh
+        bone_volume = self.dx * (np.sum(initial_BMDD) - 0.5 * (initial_BMDD[0] + initial_BMDD[-1]))
         self.initialize_formed_bone_volume(bone_volume, start)
         pass
 
@@ -292,38 +358,34 @@ class Ruffoni_Model:
           - :math:`r(C)` is the resorption rate,
           - :math:`v_m(C)` is the mineralization velocity.
 
-        - The integral is evaluated numerically using adaptive quadrature.
+        - The integral is evaluated numerically with the cumulative Simpson rule on a calcium grid with ten points
+          per mesh cell.
         - The smoothed BMDD is interpolated with a monotone cubic spline
           (``PchipInterpolator``) and clipped to enforce non-negativity.
         """
         calcium_values = np.linspace(self.parameters.calcium.minimum_content + 1e-6,
-                                     self.parameters.calcium.maximum_content - 1e-6, self.nx * 20)
+                                     self.parameters.calcium.maximum_content - 1e-6, self.nx * 10)
         formed_bone_volume = (self.calculate_formation_rate(t=0) * self.parameters.bone_volume.initial_value)
         resorption_rate = self.calculate_resorption_rate(t=0)
 
         vel = self.mineralization_velocity(calcium_values)
         vel = np.maximum(vel, 1e-9)
 
-        # Vectorized integration using numpy and list comprehension
-        def integrand(c_prime):
-            return resorption_rate / np.maximum(self.mineralization_velocity(c_prime), 1e-9)
-
-        # Use numpy vectorization for integration
-        from functools import partial
-        quad_func = np.vectorize(lambda c:
-                                 sc.integrate.quad(partial(integrand), self.parameters.calcium.minimum_content, c,
-                                                   epsabs=1e-10, epsrel=1e-8, limit=100)[0])
-        integrand_values = quad_func(calcium_values)
+        # integrals of r/v from the lower end of the grid up to every calcium value in a single cumulative sweep
+        integrand_values = np.concatenate(([0.0], sc.integrate.cumulative_simpson(resorption_rate / vel,
+                                                                                  x=calcium_values)))
 
         initial_BMDD = (formed_bone_volume / vel) * np.exp(-integrand_values)
 
-        initial_BMDD_smoothed = gaussian_filter1d(initial_BMDD, sigma=5)
+        # standard deviation of a quarter of a mesh cell (10 points per cell)
+        initial_BMDD_smoothed = gaussian_filter1d(initial_BMDD, sigma=2.5)
         bmdd_interp = PchipInterpolator(calcium_values, initial_BMDD_smoothed)
         mesh_calcium = self.mesh.cellCenters[0].value
         initial_BMDD_mesh = bmdd_interp(mesh_calcium)
         initial_BMDD_mesh = np.clip(initial_BMDD_mesh, 0, None)
 
         if plot:
+            import matplotlib.pyplot as plt
             plt.figure(figsize=(10, 6))
             plt.plot(calcium_values, np.exp(-integrand_values), label="exp(-integral)")
             plt.xlabel("Calcium Content [%wt]")
@@ -381,10 +443,13 @@ class Ruffoni_Model:
         scale = (self.parameters.reference_bmdd.standard_deviation_lower_percentile +
                  self.parameters.reference_bmdd.standard_deviation_upper_percentile) / 2
         reference_BMDD = skewnorm.pdf(calcium_values, a=shape, loc=peak, scale=scale)
-        reference_BMDD = reference_BMDD / np.trapz(reference_BMDD, calcium_values)  # Normalize to ensure integral is 1
+        # Normalize to ensure integral is 1 (trapezoidal rule on the uniform mesh)
+        reference_BMDD = reference_BMDD / (self.dx * (np.sum(reference_BMDD) -
+                                                      0.5 * (reference_BMDD[0] + reference_BMDD[-1])))
         reference_BMDD *= 25  # Scale to desired peak value
 
         if plot:
+            import matplotlib.pyplot as plt
             plt.figure(figsize=(10, 6))
             plt.plot(calcium_values, reference_BMDD, label="Initial BMDD")
             plt.xlabel("Calcium Content [%wt]")
@@ -417,36 +482,37 @@ class Ruffoni_Model:
     def calculate_bone_volume(self):
         """ Calculate current total bone volume by integrating BMDD.
         The bone volume is calculated as the sum of the product of BMDD and cell volumes across all cells.
-        The BMDD is averaged over the mesh cell volumes to ensure correct scaling.
+        As the mesh is uniform, this is the sum of the BMDD values multiplied by the cell width.
 
         :return: Total bone volume in micro m^3.
         :rtype: float"""
-        return float(self.BMDD.cellVolumeAverage * self.mesh.cellVolumes.sum())
+        return _bone_volume(self.BMDD.value, self.dx)
 
     def initialize_mineralization_velocity_from_BMDD(self):
         """Initialize mineralization velocity from BMDD steady state when start is 'BMDD'. The velocity is calculated
         by integrating the product of BMDD and resorption rate over the calcium content range and dividing the result by
         the corresponding BMDD value.
 
-        The integration is performed using the PchipInterpolator for smooth interpolation of BMDD and resorption rates
-        and numpy quad for numerical integration.
+        The integration is performed using the PchipInterpolator for smooth interpolation of BMDD and resorption rates,
+        which are evaluated on a dense calcium grid and integrated with a reverse cumulative trapezoidal rule, so the
+        tail integral for every cell center is obtained in a single sweep.
 
         :return: Mineralization velocity values as a numpy array and corresponding calcium values as a numpy array.
         :rtype: tuple of np.ndarray"""
         calcium_values = self.mesh.cellCenters[0].value
         initial_BMDD = self.BMDD.value.copy()
         bmdd_interp = PchipInterpolator(calcium_values, initial_BMDD)
-        resorption_rates = np.array([self.calculate_resorption_rate(c) for c in calcium_values])
+        # the resorption rate does not depend on the calcium content
+        resorption_rates = np.full_like(calcium_values, self.calculate_resorption_rate(0.0))
         resorption_interp = PchipInterpolator(calcium_values, resorption_rates)
 
-        def integrand(c_prime):
-            return bmdd_interp(c_prime) * resorption_interp(c_prime)
-
-        quad_func = np.vectorize(lambda c, i:
-                                 sc.integrate.quad(integrand, c, self.parameters.calcium.maximum_content,
-                                                   epsabs=1e-12, epsrel=1e-9, limit=100)[0] / max(initial_BMDD[i],
-                                                                                                  1e-30))
-        mineralization_velocity_values = quad_func(calcium_values, np.arange(len(calcium_values)))
+        calcium_dense = np.linspace(calcium_values[0], self.parameters.calcium.maximum_content, self.nx * 20)
+        integrand_dense = bmdd_interp(calcium_dense) * resorption_interp(calcium_dense)
+        # integrals from every dense grid point up to the maximum calcium content (reverse cumulative sweep)
+        tail_integral = np.concatenate((sc.integrate.cumulative_trapezoid(integrand_dense[::-1],
+                                                                          -calcium_dense[::-1])[::-1], [0.0]))
+        mineralization_velocity_values = (np.interp(calcium_values, calcium_dense, tail_integral) /
+                                          np.maximum(initial_BMDD, 1e-30))
         return calcium_values, mineralization_velocity_values
 
     def initialize_mineralization_velocity_from_mineralization_law(self, start, plot=False):
@@ -475,6 +541,7 @@ class Ruffoni_Model:
         mineralization_velocity_values = np.clip(mineralization_velocity_values, 0, None)
 
         if plot:
+            import matplotlib.pyplot as plt
             plt.figure(figsize=(10, 6))
             plt.plot(calcium_values, derivative_values,
                      label="Derivative of the inverse mineralization law", color='orange')
@@ -490,7 +557,8 @@ class Ruffoni_Model:
         """
         Initialize mineralization velocity based on the initial BMDD or mineralization law by calling the respective functions.
         This method sets up the mineralization velocity law as a PchipInterpolator based on the calcium content and
-        corresponding mineralization velocity values.
+        corresponding mineralization velocity values. As the velocity does not change in time, its values at the cell
+        centers and at the minimum calcium content are tabulated once for the time loop in ``solve_for_BMDD``.
 
         :param start: Initialization method, either 'BMDD' or 'mineralization law'.
         :type start: str
@@ -507,8 +575,12 @@ class Ruffoni_Model:
         else:
             raise ValueError("Invalid start parameter. Use 'BMDD' or 'mineralization law'.")
         self.mineralization_velocity = PchipInterpolator(calcium_values, mineralization_velocity_values)
+        self.mineralization_velocity_cells = self.mineralization_velocity(self.mesh.cellCenters[0].value)
+        self.mineralization_velocity_at_minimum = float(
+            self.mineralization_velocity(self.parameters.calcium.minimum_content))
 
         if plot:
+            import matplotlib.pyplot as plt
             plt.figure(figsize=(10, 6))
             plt.plot(calcium_values, self.mineralization_velocity(calcium_values),
                      label="Mineralization Velocity Law", color='orange')
@@ -522,7 +594,8 @@ class Ruffoni_Model:
 
     def initialize_inverse_mineralization_law_from_BMDD(self):
         """ Initialize the inverse mineralization law from BMDD steady state by integrating 1 / mineralization velocity
-        from 0 to the calcium content value using numerical integration.
+        from 0 to the calcium content value. The integrand is evaluated on a dense calcium grid and integrated with a
+        cumulative trapezoidal rule, which is then interpolated onto the cell centers.
 
         :return: Tuple of numpy arrays containing calcium values and corresponding inverse mineralization law values.
         :rtype: tuple of np.ndarray
@@ -533,27 +606,29 @@ class Ruffoni_Model:
         if initial_bone_volume <= 0:
             raise ValueError("Initial bone volume must be greater than zero.")
 
-        def integrand(c_prime):
-            return 1 / self.mineralization_velocity(c_prime)
-
-        inverse_values = []
-        for c in calcium_values:
-            [integral_result, _] = sc.integrate.quad(integrand, 0, c)
-            inverse_values.append(integral_result)
-        return calcium_values, np.array(inverse_values)
+        calcium_dense = np.linspace(0, self.parameters.calcium.maximum_content, self.nx * 20)
+        inverse_velocity_dense = 1 / np.maximum(self.mineralization_velocity(calcium_dense), 1e-12)
+        inverse_dense = np.concatenate(([0.0], sc.integrate.cumulative_trapezoid(inverse_velocity_dense,
+                                                                                 calcium_dense)))
+        inverse_values = np.interp(calcium_values, calcium_dense, inverse_dense)
+        return calcium_values, inverse_values
 
     def initialize_inverse_mineralization_law_from_mineralization_law(self):
         """ Initialize the inverse mineralization law from the mineralization law by generating a range of time values
-        and calculating the corresponding calcium values using the mineralization law. The method ensures that the
-        calcium values are unique and monotonic, and clamps them to the valid range defined by the minimum and maximum
-        calcium content.
+        and calculating the corresponding calcium values using the mineralization law. The time values are spaced
+        logarithmically, so the fast primary mineralization at small times is resolved as well as the slow secondary
+        mineralization. The method ensures that the calcium values are unique and monotonic, and clamps them to the
+        valid range defined by the minimum and maximum calcium content.
 
         :return: Tuple of numpy arrays containing calcium values and corresponding inverse mineralization law values.
         :rtype: tuple of np.ndarray"""
-        time_values = np.linspace(0, 10000, 100000)
+        time_values = np.concatenate(([0.0], np.geomspace(1e-6, 10000, self.nx * 20)))
         calcium_values = self.mineralization_law(time_values)
-        calcium_values, indices = np.unique(calcium_values, return_index=True)
-        inverse_values = time_values[indices]
+        # the law is evaluated on increasing time values, so keeping only the points that exceed all previous
+        # calcium values removes duplicates and ensures monotonicity without sorting
+        keep = np.concatenate(([True], calcium_values[1:] > np.maximum.accumulate(calcium_values)[:-1]))
+        calcium_values = calcium_values[keep]
+        inverse_values = time_values[keep]
         # Clamp to valid range
         mask = (calcium_values >= self.parameters.calcium.minimum_content) & \
                (calcium_values <= self.parameters.calcium.maximum_content)
@@ -581,6 +656,7 @@ class Ruffoni_Model:
         self.inverse_mineralization_law = PchipInterpolator(calcium_values, inverse_values, extrapolate=True)
 
         if plot:
+            import matplotlib.pyplot as plt
             plt.figure(figsize=(10, 6))
             plt.plot(calcium_values, self.inverse_mineralization_law(calcium_values),
                      label="Inverse Mineralization Law",
@@ -610,21 +686,26 @@ class Ruffoni_Model:
             calcium_values = self.mesh.cellCenters[0].value
             time_values = self.inverse_mineralization_law(calcium_values)
         elif start == 'mineralization law':
-            time_values = np.linspace(0, 10000, 1000000)
+            # log-spaced samples resolve both time constants of the law with a few thousand points
+            shortest_time_constant = min(self.parameters.mineralization_law.primary_apposition_rate,
+                                         self.parameters.mineralization_law.secondary_apposition_rate)
+            time_values = np.concatenate(([0.0], np.geomspace(shortest_time_constant * 1e-5, 10000, 8192)))
             law_choice = 'double hyperbolic'  # or 'double exponential'
             if law_choice == 'double hyperbolic':
                 calcium_values = self.initialize_double_hyperbolic_mineralization_law(time_values)
             elif law_choice == 'double exponential':
                 calcium_values = self.initialize_double_exponential_mineralization_law(time_values)
             # Remove duplicates and ensure monotonicity
-            calcium_values, indices = np.unique(calcium_values, return_index=True)
-            time_values = time_values[indices]
+            keep = np.concatenate(([True], calcium_values[1:] > np.maximum.accumulate(calcium_values)[:-1]))
+            calcium_values = calcium_values[keep]
+            time_values = time_values[keep]
         else:
             raise ValueError("Invalid start parameter. Use 'BMDD' or 'mineralization law'.")
 
         self.mineralization_law = PchipInterpolator(time_values, calcium_values)
 
         if plot:
+            import matplotlib.pyplot as plt
             plt.figure(figsize=(10, 6))
             plt.plot(time_values, self.mineralization_law(time_values), label="Mineralization Law", color='teal')
             plt.xlabel("Time since bone formation [years]")
@@ -654,20 +735,19 @@ class Ruffoni_Model:
         - :math:`r_1, r_2` are characteristic time constants of the two phases,
         - :math:`t` is the time/ tissue age.
 
-        :param time_values: Time array at which the mineralization
+        :param time_values: Time value or array at which the mineralization
             law is evaluated.
-        :type time_values: np.ndarray
+        :type time_values: float or np.ndarray
         :return: Calcium content values corresponding to the provided time points.
-        :rtype: np.ndarray
+        :rtype: float or np.ndarray
         """
-        calcium_values = (self.parameters.mineralization_law.primary_mineral_content *
-                          (time_values / self.parameters.mineralization_law.primary_apposition_rate) /
-                          (1 + (time_values / self.parameters.mineralization_law.primary_apposition_rate))) + (
-                                 self.parameters.mineralization_law.maximum_mineral_content *
-                                 (time_values / self.parameters.mineralization_law.secondary_apposition_rate) /
-                                 (1 + (
-                                         time_values / self.parameters.mineralization_law.secondary_apposition_rate)))
-        return calcium_values
+        # (t / r) / (1 + t / r) = t / (r + t), evaluated in a compiled parallel kernel on the flattened time values
+        time_values = np.asarray(time_values, dtype=np.float64)
+        calcium_values = _double_hyperbolic_mineralization_law(np.ravel(time_values),
+                                                               self.parameters.mineralization_law.coefficients)
+        if time_values.ndim == 0:
+            return float(calcium_values[0])
+        return calcium_values.reshape(time_values.shape)
 
     def initialize_double_exponential_mineralization_law(self, time_values):
         r"""
@@ -695,14 +775,12 @@ class Ruffoni_Model:
         :return: Calcium content values corresponding to the provided time points.
         :rtype: np.ndarray
         """
-        calcium_values = ((self.parameters.mineralization_law.primary_mineral_content *
-                   (1 - np.exp(-time_values /
-                               self.parameters.mineralization_law.primary_apposition_rate)))
-                  + ((self.parameters.mineralization_law.maximum_mineral_content -
-                      self.parameters.mineralization_law.primary_mineral_content) *
-                     (1 - np.exp(
-                         - time_values /
-                         self.parameters.mineralization_law.secondary_apposition_rate))))
+        (primary_mineral_content, secondary_mineral_increment, primary_apposition_rate,
+         secondary_apposition_rate) = self.parameters.mineralization_law.coefficients
+        # 1 - exp(-x) = -expm1(-x), which stays accurate for small tissue ages
+        calcium_values = ((primary_mineral_content * -np.expm1(-time_values / primary_apposition_rate))
+                          + ((secondary_mineral_increment - primary_mineral_content) *
+                             -np.expm1(-time_values / secondary_apposition_rate)))
         return calcium_values
 
     def plot_results(self, BMDD_evolution, BV_evolution, time_points):
@@ -718,43 +796,50 @@ class Ruffoni_Model:
         :type time_points: np.ndarray
         :return: None
         """
+        # matplotlib is only imported when something is plotted, so headless simulation runs do not pay for it
+        import matplotlib.pyplot as plt
+        from matplotlib.collections import LineCollection
         calcium_values = self.mesh.cellCenters[0].value
+        # BMDD normalized by the bone volume at every saved time point: one reciprocal per time point, then a
+        # broadcast multiplication over the grid
+        normalized_BMDD_evolution = BMDD_evolution * (1.0 / BV_evolution)[:, np.newaxis]
+
+        fig, axs = plt.subplots(2, 2, figsize=(18, 12))
 
         # --- Plot BMDD evolution ---
-        plt.figure(figsize=(10, 6))
-        for i, t in enumerate(time_points):
-            plt.plot(calcium_values, BMDD_evolution[i] / BV_evolution[i],
-                     label=f't = {t:.2f} years')
-        plt.xlabel('Calcium Content [wt%]')
-        plt.ylabel('BMDD [1/wt%]')
-        plt.title('Bone Mineralization Density Distribution Evolution')
-        plt.legend(loc='upper left', fontsize='small', ncol=2)
-        plt.grid(True, alpha=0.3)
+        # all saved distributions as one artist, colored by time instead of one legend entry per curve
+        BMDD_lines = LineCollection([np.column_stack((calcium_values, BMDD)) for BMDD in normalized_BMDD_evolution],
+                                    array=np.asarray(time_points), cmap='viridis')
+        axs[0][0].add_collection(BMDD_lines)
+        axs[0][0].autoscale()
+        fig.colorbar(BMDD_lines, ax=axs[0][0], label='Time [years]')
+        axs[0][0].set_xlabel('Calcium Content [wt%]')
+        axs[0][0].set_ylabel('BMDD [1/wt%]')
+        axs[0][0].set_title('Bone Mineralization Density Distribution Evolution')
+        axs[0][0].grid(True, alpha=0.3)
 
         # --- Plot BV evolution ---
-        plt.figure(figsize=(10, 6))
-        plt.plot(time_points, BV_evolution)
-        plt.ylabel('BV [micro m^3]')
-        plt.xlabel('Time')
-        plt.title('Bone Volume Evolution')
-        plt.grid(True, alpha=0.3)
+        axs[0][1].plot(time_points, BV_evolution)
+        axs[0][1].set_ylabel('BV [micro m^3]')
+        axs[0][1].set_xlabel('Time')
+        axs[0][1].set_title('Bone Volume Evolution')
+        axs[0][1].grid(True, alpha=0.3)
 
         # --- Plot Mineralization Law ---
-        plt.figure(figsize=(10, 6))
-        mineralization_law = [self.mineralization_law(time) for time in time_points]
-        plt.plot(time_points, mineralization_law, color='teal')
-        plt.xlabel("Time [years]")
-        plt.ylabel("Calcium Content [%wt]")
-        plt.title("Mineralization Law Over Time")
-        plt.grid(True, alpha=0.3)
+        mineralization_law = self.mineralization_law(np.asarray(time_points))
+        axs[1][0].plot(time_points, mineralization_law, color='teal')
+        axs[1][0].set_xlabel("Time [years]")
+        axs[1][0].set_ylabel("Calcium Content [%wt]")
+        axs[1][0].set_title("Mineralization Law Over Time")
+        axs[1][0].grid(True, alpha=0.3)
 
         # --- Plot Mineralization Velocity ---
-        plt.figure(figsize=(10, 6))
-        mineralization_velocity = [self.mineralization_velocity(c) for c in calcium_values]
-        plt.plot(calcium_values, mineralization_velocity, color='blue')
-        plt.xlabel("Calcium Content [%wt]")
-        plt.ylabel("Velocity [dc/dt, %wt/year]")
-        plt.title("Mineralization Velocity as a Function of Calcium Content")
-        plt.grid(True, alpha=0.3)
-
+        mineralization_velocity = self.mineralization_velocity(calcium_values)
+        axs[1][1].plot(calcium_values, mineralization_velocity, color='blue')
+        axs[1][1].set_xlabel("Calcium Content [%wt]")
+        axs[1][1].set_ylabel("Velocity [dc/dt, %wt/year]")
+        axs[1][1].set_title("Mineralization Velocity as a Function of Calcium Content")
+        axs[1][1].grid(True, alpha=0.3)
+
+        plt.tight_layout()
         plt.show()
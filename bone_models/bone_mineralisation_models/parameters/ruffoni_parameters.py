@@ -1,3 +1,9 @@
+import warnings
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+
+@dataclass(slots=True, eq=False)
 class Calcium:
     r"""
     Class to hold parameters for the calcium grid.
@@ -12,11 +18,11 @@ class Calcium:
     | *(float)*             |                                               |                             |
     +-----------------------+-----------------------------------------------+-----------------------------+
     """
-    def __init__(self):
-        self.minimum_content = 0
-        self.maximum_content = 31
+    minimum_content: float = 0
+    maximum_content: float = 31
 
 
+@dataclass(slots=True, eq=False)
 class Reference_BMDD:
     r""" Class to hold reference BMDD parameters for skewed Gaussian distribution if model is initialized with BMDD.
     The parameters were taken from the original paper and adjusted to fit a realistic BMDD.
@@ -35,12 +41,12 @@ class Reference_BMDD:
     | *(float)*                                    |                                               |                             |
     +----------------------------------------------+-----------------------------------------------+-----------------------------+
     """
-    def __init__(self):
-        self.standard_deviation_lower_percentile = 4.93 / 1.5
-        self.standard_deviation_upper_percentile = 5.55 / 1.5
-        self.peak = 22.94
+    standard_deviation_lower_percentile: float = 4.93 / 1.5
+    standard_deviation_upper_percentile: float = 5.55 / 1.5
+    peak: float = 22.94
 
 
+@dataclass(slots=True, eq=False)
 class Rate:
     r""" Class to hold reference BMDD parameters for formation and resorption rates. The parameters are initialized here,
     but can be changed later depending on the initialized bone volume.
@@ -61,13 +67,33 @@ class Rate:
     | *(float)*                                    |                                               |                             |
     +----------------------------------------------+-----------------------------------------------+-----------------------------+
     """
-    def __init__(self):
-        self.initial_formation = 0.1
-        self.final_formation = 0.1
-        self.initial_resorption = 0.1
-        self.final_resorption = 0.1
+    initial_formation: float = 0.1
+    final_formation: float = 0.1
+    initial_resorption: float = 0.1
+    final_resorption: float = 0.1
+
+
+class Mineralization_Law_Coefficients(NamedTuple):
+    """ Flat, immutable record of the mineralization law coefficients, as returned by
+    :attr:`Mineralization_Law.coefficients`. It can be passed as a single argument to the compiled mineralization law
+    kernels, since numba supports named tuples natively.
 
+    :param primary_mineral_content: primary mineral content in % wt.
+    :type primary_mineral_content: float
+    :param secondary_mineral_increment: secondary mineral content contribution in % wt.
+    :type secondary_mineral_increment: float
+    :param primary_apposition_rate: time constant of the primary mineralization process in years
+    :type primary_apposition_rate: float
+    :param secondary_apposition_rate: time constant of the secondary mineralization process in years
+    :type secondary_apposition_rate: float """
 
+    primary_mineral_content: float
+    secondary_mineral_increment: float
+    primary_apposition_rate: float
+    secondary_apposition_rate: float
+
+
+@dataclass(slots=True, eq=False)
 class Mineralization_Law:
     r"""
     Class representing the mineralization law parameters used in the mineralization model.
@@ -79,7 +105,10 @@ class Mineralization_Law:
     +-----------------------------------------+-----------------------------------------------+-----------------------------+
     | ``primary_mineral_content`` *(float)*   | Primary mineral content in % wt.              | :math:`c_{1}`               |
     +-----------------------------------------+-----------------------------------------------+-----------------------------+
-    | ``maximum_mineral_content`` *(float)*   | Secondary mineral content contribution in % wt| :math:`c_{2}`               |
+    | ``total_mineral_content`` *(float)*     | Total mineral content in % wt.                | :math:`c_{1} + c_{2}`       |
+    +-----------------------------------------+-----------------------------------------------+-----------------------------+
+    | ``secondary_mineral_increment``         | Secondary mineral content contribution in % wt| :math:`c_{2}`               |
+    | *(float, read-only)*                    | (total minus primary mineral content)         |                             |
     +-----------------------------------------+-----------------------------------------------+-----------------------------+
     | ``primary_apposition_rate`` *(float)*   | Time constant of the primary mineralization   | :math:`\tau_{1}`            |
     |                                         | process in years                              |                             |
@@ -88,14 +117,52 @@ class Mineralization_Law:
     |                                         | process years                                 |                             |
     +-----------------------------------------+-----------------------------------------------+-----------------------------+
     """
-    def __init__(self):
-        self.turnover_time = 5  # [years]
-        self.primary_mineral_content = 11.9
-        self.maximum_mineral_content = 31.1 - self.primary_mineral_content
-        self.primary_apposition_rate = 150
-        self.secondary_apposition_rate = 0.2
+    turnover_time: float = 5  # [years]
+    primary_mineral_content: float = 11.9
+    total_mineral_content: float = 31.1
+    primary_apposition_rate: float = 150
+    secondary_apposition_rate: float = 0.2
+
+    @property
+    def secondary_mineral_increment(self):
+        """ Secondary mineral content contribution, i.e. the total minus the primary mineral content.
+
+        :return: secondary mineral content contribution in % wt.
+        :rtype: float"""
+        return self.total_mineral_content - self.primary_mineral_content
+
+    @property
+    def maximum_mineral_content(self):
+        """ Deprecated former name of the secondary mineral content contribution, kept for backwards compatibility.
+        Use ``secondary_mineral_increment`` to read it and ``total_mineral_content`` to change it. Setting it sets
+        the total mineral content to the primary mineral content plus the given value.
+
+        :return: secondary mineral content contribution in % wt.
+        :rtype: float"""
+        warnings.warn("Mineralization_Law.maximum_mineral_content is deprecated, use secondary_mineral_increment "
+                      "instead.", DeprecationWarning, stacklevel=2)
+        return self.secondary_mineral_increment
+
+    @maximum_mineral_content.setter
+    def maximum_mineral_content(self, value):
+        warnings.warn("Mineralization_Law.maximum_mineral_content is deprecated, use secondary_mineral_increment "
+                      "instead.", DeprecationWarning, stacklevel=2)
+        self.total_mineral_content = self.primary_mineral_content + value
+
+    @property
+    def coefficients(self):
+        """ Coefficients of the mineralization law in the order in which the mineralization law functions use them.
+        They are read from the attributes on every access, so later changes of the parameters are taken into account.
+
+        :return: primary mineral content, secondary mineral increment, primary and secondary apposition rate
+        :rtype: Mineralization_Law_Coefficients"""
+        return Mineralization_Law_Coefficients(float(self.primary_mineral_content),
+                                               float(self.secondary_mineral_increment),
+                                               float(self.primary_apposition_rate),
+                                               float(self.secondary_apposition_rate))
 
 
+@dataclass(slots=True, eq=False)
 class Bone_Volume:
     r"""
     Class storing the bone volume parameters required for initializing
@@ -109,17 +176,16 @@ class Bone_Volume:
     |                                   | in :math:`mm^3`                           |                         |
     +-----------------------------------+-------------------------------------------+-------------------------+
     """
-    def __init__(self):
-        self.initial_value = 2.4  # [mm^3]
+    initial_value: float = 2.4  # [mm^3]
 
 
+@dataclass(slots=True, eq=False)
 class Ruffoni_Parameters:
     r"""
     Class to hold all parameters for the Ruffoni mineralization model.
     """
-    def __init__(self):
-        self.calcium = Calcium()
-        self.rate = Rate()
-        self.reference_bmdd = Reference_BMDD()
-        self.mineralization_law = Mineralization_Law()
-        self.bone_volume = Bone_Volume()
+    calcium: Calcium = field(default_factory=Calcium)
+    rate: Rate = field(default_factory=Rate)
+    reference_bmdd: Reference_BMDD = field(default_factory=Reference_BMDD)
+    mineralization_law: Mineralization_Law = field(default_factory=Mineralization_Law)
+    bone_volume: Bone_Volume = field(default_factory=Bone_Volume)
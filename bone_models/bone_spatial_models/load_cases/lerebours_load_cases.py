@@ -1,3 +1,9 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(slots=True, eq=False)
 class Lerebours_Load_Case_Osteoporosis:
     """ Load case representing osteoporosis conditions (altered PTH levels) based on the publication.
     Relevant to this specific model are the parameters PTH_injection, force_reduction, and moment_reduction.
@@ -15,21 +21,21 @@ class Lerebours_Load_Case_Osteoporosis:
     :param moment_reduction: Reduction factor multiplied with applied moments (1 - reduction_fraction)
     :type moment_reduction: float
     """
-    def __init__(self):
-        self.start_time = 0
-        self.end_time = 500000000000000
-        self.stress_tensor = None   # [GPa]
-        self.OBp_injection = 0
-        self.OBa_injection = 0
-        self.OCa_injection = 0
-        self.PTH_injection = 0.047
-        self.OPG_injection = 0
-        self.RANKL_injection = 0
-        self.TGFb_injection = 0
-        self.force_reduction = 1 - 0  # 0% reduction in force
-        self.moment_reduction = 1 - 0  # 0% reduction in moment
+    start_time: float = 0
+    end_time: float = 500000000000000
+    stress_tensor: np.ndarray = None   # [GPa]
+    OBp_injection: float = 0
+    OBa_injection: float = 0
+    OCa_injection: float = 0
+    PTH_injection: float = 0.047
+    OPG_injection: float = 0
+    RANKL_injection: float = 0
+    TGFb_injection: float = 0
+    force_reduction: float = 1 - 0  # 0% reduction in force
+    moment_reduction: float = 1 - 0  # 0% reduction in moment
 
 
+@dataclass(slots=True, eq=False)
 class Lerebours_Load_Case_Spaceflight:
     """ Load case representing microgravity conditions (reduced loading) based on the publication.
     Relevant to this specific model are the parameters PTH_injection, force_reduction, and moment_reduction.
@@ -47,19 +53,18 @@ class Lerebours_Load_Case_Spaceflight:
     :param moment_reduction: Reduction factor multiplied with applied moments (1 - reduction_fraction)
     :type moment_reduction: float
     """
-    def __init__(self):
-        self.start_time = 0
-        self.end_time = 500000000000000
-        self.stress_tensor = None   # [GPa]
-        self.OBp_injection = 0
-        self.OBa_injection = 0
-        self.OCa_injection = 0
-        # -> I_P
-        self.PTH_injection = 0
-        # -> I_O
-        self.OPG_injection = 0
-        # -> I_L
-        self.RANKL_injection = 0
-        self.TGFb_injection = 0
-        self.force_reduction = 1 - 0.8  # 80% reduction in force
-        self.moment_reduction = 1 - 0.8  # 80% reduction in force
+    start_time: float = 0
+    end_time: float = 500000000000000
+    stress_tensor: np.ndarray = None   # [GPa]
+    OBp_injection: float = 0
+    OBa_injection: float = 0
+    OCa_injection: float = 0
+    # -> I_P
+    PTH_injection: float = 0
+    # -> I_O
+    OPG_injection: float = 0
+    # -> I_L
+    RANKL_injection: float = 0
+    TGFb_injection: float = 0
+    force_reduction: float = 1 - 0.8  # 80% reduction in force
+    moment_reduction: float = 1 - 0.8  # 80% reduction in force
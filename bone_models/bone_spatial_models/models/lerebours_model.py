@@ -1,8 +1,136 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 import numpy as np
 import matplotlib.pyplot as plt
+from numba import njit
 import pandas as pd
 from bone_models.bone_spatial_models.parameters.lerebours_parameters import Lerebours_Parameters
 from bone_models.bone_cell_population_models.models.lerebours_model import Lerebours_Model as Lerebours_Bone_Cell_Model
+from bone_models.bone_cell_population_models.models.lerebours_model import solve_bone_cell_population_models
+
+# quantities stored for every RVE and time point in the results of Lerebours_Model.solve_spatial_model
+RESULT_FIELDS = ('OBp', 'OBa', 'OCp', 'OCa', 'porosity', 'BV/TV', 'SED_bm', 'strain_effect_on_OBp', 'stress_xx')
+# number of neighbouring RVEs whose BCPMs are stacked into one ODE solve; fixed, so that the results do not depend on
+# the number of worker processes
+RVE_BLOCK_SIZE = 128
+
+
+@njit(cache=True, fastmath=True)
+def _strain_decomposition(y, z, stiffness, element_area, axial_force, bending_moment_y, bending_moment_z):
+    """ Compiled version of :meth:`Lerebours_Model.calculate_strain_decomposition` for given forces and moments. The
+    stiffness-weighted sums of the normal force center and of the second moments of area are each accumulated in a
+    single pass over the RVEs. The system of equations is solved in closed form: the axial row decouples and the
+    bending rows are a symmetric 2x2 system.
+
+    :param y: y-coordinates of the RVEs in m
+    :type y: numpy.ndarray
+    :param z: z-coordinates of the RVEs in m
+    :type z: numpy.ndarray
+    :param stiffness: longitudinal stiffness of the RVEs in Pa
+    :type stiffness: numpy.ndarray
+    :param element_area: area of a single RVE in the cross-section in m^2
+    :type element_area: float
+    :param axial_force: axial force in N
+    :type axial_force: float
+    :param bending_moment_y: bending moment around the y-axis in Nm
+    :type bending_moment_y: float
+    :param bending_moment_z: bending moment around the z-axis in Nm
+    :type bending_moment_z: float
+    :return: axial strain, curvature around y, curvature around z, y- and z-coordinate of the normal force center
+    :rtype: tuple of float"""
+    total_stiffness = 0.0
+    stiffness_moment_y = 0.0
+    stiffness_moment_z = 0.0
+    for i in range(stiffness.shape[0]):
+        total_stiffness += stiffness[i]
+        stiffness_moment_y += stiffness[i] * y[i]
+        stiffness_moment_z += stiffness[i] * z[i]
+    y_normal_force_center = stiffness_moment_y / total_stiffness
+    z_normal_force_center = stiffness_moment_z / total_stiffness
+    second_moment_y = 0.0
+    second_moment_z = 0.0
+    second_moment_yz = 0.0
+    for i in range(stiffness.shape[0]):
+        y_distance = y[i] - y_normal_force_center
+        z_distance = z[i] - z_normal_force_center
+        second_moment_y += stiffness[i] * z_distance * z_distance
+        second_moment_z += stiffness[i] * y_distance * y_distance
+        second_moment_yz += stiffness[i] * y_distance * z_distance
+    axial_stiffness = total_stiffness * element_area
+    second_moment_y *= element_area
+    second_moment_z *= element_area
+    second_moment_yz *= element_area
+    # [[A, 0, 0], [0, Iyy, -Iyz], [0, -Iyz, Izz]] @ [strain, curvature_z, curvature_y] = [N, My, Mz]
+    axial_strain = axial_force / axial_stiffness
+    determinant = second_moment_y * second_moment_z - second_moment_yz * second_moment_yz
+    curvature_z = (second_moment_z * bending_moment_y + second_moment_yz * bending_moment_z) / determinant
+    curvature_y = (second_moment_yz * bending_moment_y + second_moment_y * bending_moment_z) / determinant
+    return axial_strain, curvature_y, curvature_z, y_normal_force_center, z_normal_force_center
+
+
+@njit(cache=True, fastmath=True)
+def _axial_stress(y, z, stiffness, element_area, axial_force, bending_moment_y, bending_moment_z):
+    """ Compiled version of the stress update in :meth:`Lerebours_Model.update_stress_tensor`. The strain decomposition
+    (:func:`_strain_decomposition`) and the axial strain and stress of every RVE are computed in one call, so the
+    arrays are passed to compiled code only once per mechanics update.
+
+    :param y: y-coordinates of the RVEs in m
+    :type y: numpy.ndarray
+    :param z: z-coordinates of the RVEs in m
+    :type z: numpy.ndarray
+    :param stiffness: longitudinal stiffness of the RVEs in Pa
+    :type stiffness: numpy.ndarray
+    :param element_area: area of a single RVE in the cross-section in m^2
+    :type element_area: float
+    :param axial_force: axial force in N
+    :type axial_force: float
+    :param bending_moment_y: bending moment around the y-axis in Nm
+    :type bending_moment_y: float
+    :param bending_moment_z: bending moment around the z-axis in Nm
+    :type bending_moment_z: float
+    :return: axial stress of the RVEs in Pa
+    :rtype: numpy.ndarray"""
+    axial_strain, curvature_y, curvature_z, y_normal_force_center, z_normal_force_center = _strain_decomposition(
+        y, z, stiffness, element_area, axial_force, bending_moment_y, bending_moment_z)
+    stress_xx = np.empty_like(stiffness)
+    for i in range(stiffness.shape[0]):
+        strain_xx = (axial_strain - curvature_y * (y[i] - y_normal_force_center) +
+                     curvature_z * (z[i] - z_normal_force_center))
+        stress_xx[i] = stiffness[i] * strain_xx
+    return stress_xx
+
+
+def _solve_RVEs(bone_cell_models, stresses_xx, initial_conditions, t_start, t_end):
+    """ Solves the bone cell population models of several RVEs over one mechanics interval in a single (stacked) ODE
+    solve, used as worker by :meth:`Lerebours_Model.solve_spatial_model`. The models are returned together with the
+    solution, since they are changed by the solve (mechanical state, strain energy density) and a worker process only
+    changes its own copies.
+
+    :param bone_cell_models: bone cell population models of the RVEs
+    :type bone_cell_models: numpy.ndarray of Lerebours_Bone_Cell_Model
+    :param stresses_xx: axial stresses of the RVEs in Pa
+    :type stresses_xx: numpy.ndarray
+    :param initial_conditions: states [OBp, OBa, OCp, OCa, porosity, BV/TV] at the start of the interval, one row per
+        RVE
+    :type initial_conditions: numpy.ndarray
+    :param t_start: start time of the interval in days
+    :type t_start: float
+    :param t_end: end time of the interval in days
+    :type t_end: float
+    :return: updated bone cell population models and states [OBp, OBa, OCp, OCa, porosity, BV/TV] at the end time
+    :rtype: tuple(numpy.ndarray, numpy.ndarray)"""
+    packed_parameters = []
+    # the bone cell models take the stress in GPa, converted for all RVEs at once
+    for bone_cell_model, stress_xx_GPa, (OBp, OBa, OCp, OCa, porosity, bone_volume_fraction) in zip(
+            bone_cell_models, stresses_xx * 1e-9, initial_conditions):
+        # set new stress tensor for the bone cell model
+        bone_cell_model.set_macroscopic_stress_tensor(stress_xx_GPa, 0, 0)
+        bone_cell_model.apply_mechanical_effects(OBp, OBa, OCa, porosity, bone_volume_fraction, t_start)
+        # the load case (and its stress tensor) is shared by the models, so it is packed before the next stress is set
+        packed_parameters.append(bone_cell_model.pack_parameters())
+    solution = solve_bone_cell_population_models(bone_cell_models, [t_start, t_end], initial_conditions,
+                                                 packed_parameters, t_eval=[t_end])
+    return bone_cell_models, solution.y[:, -1].reshape(-1, 6)
 
 
 class Lerebours_Model:
@@ -21,7 +149,7 @@ class Lerebours_Model:
        Biomechanics and Modeling in Mechanobiology, 15(1), 43-67.
        :doi:`10.1007/s10237-015-0705-x`
     """
-    def __init__(self, load_case, duration_of_simulation=3):
+    def __init__(self, load_case, duration_of_simulation=3, seed=None):
         """
         Initializes the spatial model parameters and simulation timing.
 
@@ -29,19 +157,29 @@ class Lerebours_Model:
         :type load_case: Load_Case
         :param duration_of_simulation: Simulation length in years.
         :type duration_of_simulation: int
+        :param seed: Seed of the random number generator for the initial BV/TV fields. With the same seed, the same
+            cross-section is generated; if None, a fresh seed is used.
+        :type seed: int or None
         """
         self.parameters = Lerebours_Parameters()
         self.load_case = load_case
         self.duration_of_simulation = duration_of_simulation * 365
         self.time_for_mechanics_update = 1 * 365
+        # random number generator of the initial BV/TV fields, independent of the global numpy random state
+        self.rng = np.random.default_rng(seed)
+        # bone cell population models of the RVEs (in the row order of the cross-section), set in solve_spatial_model
+        self.models = None
 
-    def initialize_circular_cross_section(self):
+    def initialize_circular_cross_section(self, plot=False):
         """
         Generates an idealized circular bone cross-section with radial density zones.
 
         Creates a grid-based geometry with an outer cortical ring and a
         transitional inner zone using a simple radial mask.
 
+        :param plot: If ``True``, plots the initial BV/TV field. Defaults to ``False``, so that batch runs are not
+            blocked by the figure.
+        :type plot: bool
         :return: DataFrame containing coordinates (y, z) and initial BV/TV values.
         :rtype: pandas.DataFrame
         """
@@ -51,53 +189,58 @@ class Lerebours_Model:
         length_mm = num_elements * grid_size_mm
         y = np.linspace(-length_mm / 2, length_mm / 2, num_elements)
         z = np.linspace(-length_mm / 2, length_mm / 2, num_elements)
-        Y, Z = np.meshgrid(y, z)
-        radius = np.sqrt(Y ** 2 + Z ** 2)
+        # grid coordinates as a row (y) and a column (z) that broadcast to the grid, like np.meshgrid(y, z)
+        Y, Z = y[np.newaxis, :], z[:, np.newaxis]
+        # squared radius, compared with squared radii below
+        radius_squared = Y ** 2 + Z ** 2
 
         # create circular mask (in mm)
         outer_radius = self.parameters.cross_section.outer_radius
         inner_radius = self.parameters.cross_section.inner_radius
-        mask = (radius >= inner_radius) & (radius <= outer_radius)
+        mask = (radius_squared >= inner_radius ** 2) & (radius_squared <= outer_radius ** 2)
 
         # fill in BV/TV values based on radial zones (cortical, transitional, trabecular)
-        bv_tv_matrix = np.zeros_like(Y)
-        rand_vals_outer = 0.8 + 0.2 * np.random.rand(*Y.shape)
-        rand_vals_outer = np.clip(rand_vals_outer, 0.01, 0.99)
-        bv_tv_matrix[(radius > 10) & (radius <= 17)] = rand_vals_outer[(radius > 10) & (radius <= 17)]
-        rand_vals_mid = 0.3 + 0.1 * np.random.rand(*Y.shape)
-        rand_vals_mid = np.clip(rand_vals_mid, 0.01, 0.99)
-        bv_tv_matrix[(radius > 7) & (radius <= 10)] = rand_vals_mid[(radius > 7) & (radius <= 10)]
-        bv_tv_matrix[~mask] = np.nan
+        zone_outer = mask & (radius_squared > 10 ** 2) & (radius_squared <= 17 ** 2)
+        zone_mid = mask & (radius_squared > 7 ** 2) & (radius_squared <= 10 ** 2)
+        bv_tv_matrix = np.where(mask, 0.0, np.nan)
+        # random values are only drawn for the elements of each zone
+        rand_vals_outer = 0.8 + 0.2 * self.rng.random(np.count_nonzero(zone_outer))
+        bv_tv_matrix[zone_outer] = np.clip(rand_vals_outer, 0.01, 0.99)
+        rand_vals_mid = 0.3 + 0.1 * self.rng.random(np.count_nonzero(zone_mid))
+        bv_tv_matrix[zone_mid] = np.clip(rand_vals_mid, 0.01, 0.99)
+        Y, Z = np.broadcast_arrays(Y, Z)
 
         # plotting
-        plt.figure(figsize=(6, 5))
-        c = plt.pcolormesh(Z, Y, bv_tv_matrix, cmap='seismic', shading='auto', vmin=0, vmax=1)
-        plt.colorbar(c, label='BV/TV')
-        plt.title('Femur-like Circular BV/TV Field')
-        plt.xlabel('z [mm]')
-        plt.ylabel('y [mm]')
-        plt.axis('equal')
-        plt.tight_layout()
-        plt.show()
+        if plot:
+            plt.figure(figsize=(6, 5))
+            c = plt.pcolormesh(Z, Y, bv_tv_matrix, cmap='seismic', shading='auto', vmin=0, vmax=1)
+            plt.colorbar(c, label='BV/TV')
+            plt.title('Femur-like Circular BV/TV Field')
+            plt.xlabel('z [mm]')
+            plt.ylabel('y [mm]')
+            plt.axis('equal')
+            plt.tight_layout()
+            plt.show()
         # return dataframe
-        flat_y = Y.flatten()
-        flat_z = Z.flatten()
-        flat_bvtv = bv_tv_matrix.flatten()
-        valid = ~np.isnan(flat_bvtv)
-        df = pd.DataFrame({
-            'y': flat_y[valid],
-            'z': flat_z[valid],
-            'BV/TV': flat_bvtv[valid]
-        })
+        valid = ~np.isnan(bv_tv_matrix)
+        # columns of a Fortran-ordered array are contiguous, so the DataFrame can use the array without copying it
+        data = np.empty((np.count_nonzero(valid), 3), order='F')
+        data[:, 0] = Y[valid]
+        data[:, 1] = Z[valid]
+        data[:, 2] = bv_tv_matrix[valid]
+        df = pd.DataFrame(data, columns=['y', 'z', 'BV/TV'], copy=False)
         return df
 
-    def initialize_elliptical_cross_section(self):
+    def initialize_elliptical_cross_section(self, plot=False):
         """
         Generates an idealized elliptical femur midshaft cross-section.
 
         Uses elliptical boundaries to define three distinct zones: dense cortical
         bone, transitional cortex, and the medullary cavity (marrow).
 
+        :param plot: If ``True``, plots the initial BV/TV field. Defaults to ``False``, so that batch runs are not
+            blocked by the figure.
+        :type plot: bool
         :return: DataFrame containing coordinates (y, z) and initial BV/TV values.
         :rtype: pandas.DataFrame
         """
@@ -107,7 +250,8 @@ class Lerebours_Model:
         length_mm = num_elements * grid_size_mm
         y = np.linspace(-length_mm / 2, length_mm / 2, num_elements)
         z = np.linspace(-length_mm / 2, length_mm / 2, num_elements)
-        Y, Z = np.meshgrid(y, z)
+        # grid coordinates as a row (y) and a column (z) that broadcast to the grid, like np.meshgrid(y, z)
+        Y, Z = y[np.newaxis, :], z[:, np.newaxis]
 
         # periosteal parameters (outer boundary)
         peri_y_radius = 17.0  # Mediolateral (wider)
@@ -128,38 +272,37 @@ class Lerebours_Model:
         zone_transitional = mask_mid & ~mask_endo
 
         # fill in BV/TV values based on zones
-        bv_tv_matrix = np.full_like(Y, np.nan)
-        rand_vals_cortical = 0.8 + 0.2 * np.random.rand(*Y.shape)
-        rand_vals_cortical = np.clip(rand_vals_cortical, 0.01, 0.99)
-        rand_vals_trans = 0.3 + 0.1 * np.random.rand(*Y.shape)
-        rand_vals_trans = np.clip(rand_vals_trans, 0.01, 0.99)
-        bv_tv_matrix[zone_cortical] = rand_vals_cortical[zone_cortical]
-        bv_tv_matrix[zone_transitional] = rand_vals_trans[zone_transitional]
+        bv_tv_matrix = np.full((num_elements, num_elements), np.nan)
+        # random values are only drawn for the elements of each zone
+        rand_vals_cortical = 0.8 + 0.2 * self.rng.random(np.count_nonzero(zone_cortical))
+        bv_tv_matrix[zone_cortical] = np.clip(rand_vals_cortical, 0.01, 0.99)
+        rand_vals_trans = 0.3 + 0.1 * self.rng.random(np.count_nonzero(zone_transitional))
+        bv_tv_matrix[zone_transitional] = np.clip(rand_vals_trans, 0.01, 0.99)
+        Y, Z = np.broadcast_arrays(Y, Z)
 
         # plotting
-        plt.figure(figsize=(6, 5))
-        c = plt.pcolormesh(Z, Y, bv_tv_matrix, cmap='seismic', shading='auto', vmin=0, vmax=1)
-        plt.colorbar(c, label='BV/TV')
-        plt.title('Realistic Femur Midshaft BV/TV Field')
-        plt.xlabel('z (A-P) [mm]')
-        plt.ylabel('y (M-L) [mm]')
-        plt.axis('equal')
-        plt.tight_layout()
-        plt.show()
+        if plot:
+            plt.figure(figsize=(6, 5))
+            c = plt.pcolormesh(Z, Y, bv_tv_matrix, cmap='seismic', shading='auto', vmin=0, vmax=1)
+            plt.colorbar(c, label='BV/TV')
+            plt.title('Realistic Femur Midshaft BV/TV Field')
+            plt.xlabel('z (A-P) [mm]')
+            plt.ylabel('y (M-L) [mm]')
+            plt.axis('equal')
+            plt.tight_layout()
+            plt.show()
         # return dataframe
-        flat_y = Y.flatten()
-        flat_z = Z.flatten()
-        flat_bvtv = bv_tv_matrix.flatten()
-        valid = ~np.isnan(flat_bvtv)
-        df = pd.DataFrame({
-            'y': flat_y[valid],
-            'z': flat_z[valid],
-            'BV/TV': flat_bvtv[valid]
-        })
+        valid = ~np.isnan(bv_tv_matrix)
+        # columns of a Fortran-ordered array are contiguous, so the DataFrame can use the array without copying it
+        data = np.empty((np.count_nonzero(valid), 3), order='F')
+        data[:, 0] = Y[valid]
+        data[:, 1] = Z[valid]
+        data[:, 2] = bv_tv_matrix[valid]
+        df = pd.DataFrame(data, columns=['y', 'z', 'BV/TV'], copy=False)
         print(f"Generated {len(df)} valid RVEs for the midshaft.")
         return df
 
-    def solve_spatial_model(self, only_initialize=False):
+    def solve_spatial_model(self, only_initialize=False, max_workers=1):
         """
         Executes the multiscale simulation loop over the specified duration.
 
@@ -167,89 +310,118 @@ class Lerebours_Model:
         populations via BCPMs and periodically recalculating the macroscopic
         stress distribution based on changed bone density/stiffness.
 
-        For initialization, each RVE gets one BCPM instance with mechanical environment depending on the local bone
-        volume fraction and the steady-state is calculated. All BCPMs in the cross-section are solved over time intervals,
+        For initialization, each RVE gets one BCPM instance (stored in ``self.models``, not in the cross-section) with
+        mechanical environment depending on the local bone volume fraction and the steady-state is calculated.
+        All BCPMs in the cross-section are solved over time intervals,
         after each the macroscopic mechanics ("global" stress tensor) are updated.
         The results are saved at the end of each interval and represent the initial condition for the next interval with
         the "new" macro stress tensor.
 
+        The BCPMs of different RVEs are independent within an interval, so the ODE systems of each block of
+        ``RVE_BLOCK_SIZE`` neighbouring RVEs are stacked and solved in a single solver call (see
+        :func:`solve_bone_cell_population_models`). The blocks can be solved in parallel worker processes. The models
+        are then sent to the workers and returned with their updated state in every interval. The blocks do not depend
+        on the number of workers, so the results are the same for every ``max_workers``.
+
+        The results are stored as one array per quantity (see ``RESULT_FIELDS``) with one row per time point (start of
+        the simulation and end of every interval, in days in ``results['time']``) and one column per RVE, in the row
+        order of the cross-section (the RVE index of the cross-section is its row number). ``stress_xx`` is the stress
+        acting at the time point (after the mechanics update).
+        :meth:`results_to_nested_dict` converts them to the nested dictionary ``results[time][RVE_index][quantity]``.
+
         :param only_initialize: If True, returns after setup without running the ODE solver.
         :type only_initialize: bool
-        :return: Final cross-section state and a dictionary of temporal results.
+        :param max_workers: Number of worker processes for the BCPM solves in each interval. If 1, all blocks are
+            solved in this process, if None the number of processors is used.
+        :type max_workers: int or None
+        :return: Final cross-section state and a dictionary of result arrays (time points x RVEs) and time points.
         :rtype: tuple(pandas.DataFrame, dict)
         """
-        cross_section = self.initialize_elliptical_cross_section()
-        models = [Lerebours_Bone_Cell_Model(self.load_case, porosity=1 - bone_volume_fraction) for bone_volume_fraction
-                  in cross_section['BV/TV']]
+        cross_section = self.initialize_elliptical_cross_section(plot=False)
+        # the BCPMs are kept next to the cross-section, which only holds numeric columns
+        porosities = 1 - cross_section['BV/TV'].to_numpy()
+        self.models = np.array([Lerebours_Bone_Cell_Model(self.load_case, porosity=porosity)
+                                for porosity in porosities], dtype=object)
+        # the Hill tensor only depends on the mechanical parameters, which are the same for all RVEs: integrate it
+        # once and share it instead of integrating it again in the steady state of every BCPM
+        hill_tensor_cylindrical_inclusion = self.models[0].calculate_hill_tensor_cylindrical_inclusion()
+        for bone_cell_model in self.models[1:]:
+            bone_cell_model.parameters.mechanics.hill_tensor_cylindrical_inclusion = hill_tensor_cylindrical_inclusion
         cross_section['y'] = cross_section['y'] * 1e-3  # Convert to meters
         cross_section['z'] = cross_section['z'] * 1e-3  # Convert to meters
-        cross_section['models'] = models
         cross_section = self.update_stress_tensor(cross_section, t=None)
 
         number_of_intervals = self.duration_of_simulation // self.time_for_mechanics_update
+        number_of_RVEs = len(cross_section)
+        number_of_time_points = 1 if only_initialize else number_of_intervals + 1
         t_start, t_end = 0, self.time_for_mechanics_update
-        results = {t_start: {RVE_index: {} for RVE_index in cross_section.index}}
+        # one row per time point and one column per RVE for every quantity, written with indexed stores
+        results = {field: np.full((number_of_time_points, number_of_RVEs), np.nan) for field in RESULT_FIELDS}
+        results['time'] = np.arange(number_of_time_points) * self.time_for_mechanics_update
+        results['BV/TV'][0] = cross_section['BV/TV'].to_numpy()
+        results['porosity'][0] = porosities
+        results['stress_xx'][0] = cross_section['stress_xx'].to_numpy()
         # Initialise BCPMs
-        for RVE_index, row in cross_section.iterrows():
-            bone_volume_fraction, bone_cell_model, stress_xx = (row['BV/TV'], row['models'], row['stress_xx'])
-            bone_cell_model.set_macroscopic_stress_tensor(stress_xx * 1e-9, 0, 0, steady_state=True)
+        # iterate over the underlying arrays (stress converted to GPa at once), the RVE index is the row number
+        for RVE_index, (porosity, bone_cell_model, stress_xx_GPa) in enumerate(
+                zip(porosities, self.models, results['stress_xx'][0] * 1e-9)):
+            bone_cell_model.set_macroscopic_stress_tensor(stress_xx_GPa, 0, 0, steady_state=True)
             # Calculate steady state
-            bone_cell_model.calculate_steady_state(1 - bone_volume_fraction)
-            results[t_start][RVE_index]['OBp'] = bone_cell_model.steady_state.OBp
-            results[t_start][RVE_index]['OBa'] = bone_cell_model.steady_state.OBa
-            results[t_start][RVE_index]['OCp'] = bone_cell_model.steady_state.OCp
-            results[t_start][RVE_index]['OCa'] = bone_cell_model.steady_state.OCa
-            results[t_start][RVE_index]['porosity'] = 1 - bone_volume_fraction
-            results[t_start][RVE_index]['BV/TV'] = bone_volume_fraction
-            results[t_start][RVE_index]['SED_bm'] = bone_cell_model.parameters.mechanics.strain_energy_density_steady_state
-            results[t_start][RVE_index]['strain_effect_on_OBp'] = bone_cell_model.strain_effect_on_OBp
-            results[t_start][RVE_index]['stress_xx'] = stress_xx
+            bone_cell_model.calculate_steady_state(porosity)
+            results['OBp'][0, RVE_index] = bone_cell_model.steady_state.OBp
+            results['OBa'][0, RVE_index] = bone_cell_model.steady_state.OBa
+            results['OCp'][0, RVE_index] = bone_cell_model.steady_state.OCp
+            results['OCa'][0, RVE_index] = bone_cell_model.steady_state.OCa
+            results['SED_bm'][0, RVE_index] = bone_cell_model.parameters.mechanics.strain_energy_density_steady_state
+            results['strain_effect_on_OBp'][0, RVE_index] = bone_cell_model.strain_effect_on_OBp
 
         if only_initialize:
             return cross_section, results
 
-        for interval in range(number_of_intervals):
-            print(f"--- Interval {interval + 1}: {t_start} to {t_end} days ---")
-            results[t_end] = {}
-            results[t_end] = {RVE_index: {} for RVE_index in cross_section.index}
-            for RVE_index, row in cross_section.iterrows():
-                y, z, bone_volume_fraction, element_stiffness, stress_xx, bone_cell_model = (
-                    row['y'], row['z'],
-                    row['BV/TV'], row['Stiffness'],
-                    row['stress_xx'], row['models'])
-                # set new stress tensor for the bone cell model
-                bone_cell_model.set_macroscopic_stress_tensor(stress_xx * 1e-9, 0, 0)
-                # Update the last solution for this RVE (for initial condition for the next interval)
-                OBp, OBa, OCp, OCa, porosity, bone_volume_fraction = (results[t_start][RVE_index]['OBp'],
-                                                                      results[t_start][RVE_index]['OBa'],
-                                                                      results[t_start][RVE_index]['OCp'],
-                                                                      results[t_start][RVE_index]['OCa'],
-                                                                      results[t_start][RVE_index]['porosity'],
-                                                                      results[t_start][RVE_index]['BV/TV'])
-                initial_conditions = np.array([OBp, OBa, OCp, OCa, porosity, bone_volume_fraction])
-                # bone_cell_model.update_mechanical_effects = True
-                bone_cell_model.apply_mechanical_effects(OBp, OBa, OCa, porosity, bone_volume_fraction, t_start)
-                # bone_cell_model.update_mechanical_effects = False
-                solution = bone_cell_model.solve_bone_cell_population_model(tspan=[t_start, t_end],
-                                                                            porosity=1 - bone_volume_fraction,
-                                                                            initial_conditions=initial_conditions)
-                [OBp, OBa, OCp, OCa, porosity, bone_volume_fraction] = solution.y[:, -1]
-                # 2. Save solution at end time point in the results dictionary
-                results[t_end][RVE_index]['OBp'] = OBp
-                results[t_end][RVE_index]['OBa'] = OBa
-                results[t_end][RVE_index]['OCp'] = OCp
-                results[t_end][RVE_index]['OCa'] = OCa
-                results[t_end][RVE_index]['porosity'] = porosity
-                results[t_end][RVE_index]['BV/TV'] = bone_volume_fraction
-                results[t_end][RVE_index]['SED_bm'] = bone_cell_model.strain_energy_density
-                results[t_end][RVE_index]['strain_effect_on_OBp'] = bone_cell_model.strain_effect_on_OBp
-
-                cross_section.at[RVE_index, 'BV/TV'] = solution.y[5][-1]
-            cross_section = self.update_stress_tensor(cross_section, t_end)
-            t_start = t_end
-            t_end += self.time_for_mechanics_update
+        state_fields = ('OBp', 'OBa', 'OCp', 'OCa', 'porosity', 'BV/TV')
+        # the RVEs are solved in blocks of neighbouring RVEs, in parallel every worker solves one block at a time
+        blocks = [slice(start, start + RVE_BLOCK_SIZE) for start in range(0, number_of_RVEs, RVE_BLOCK_SIZE)]
+        number_of_blocks = len(blocks)
+        with ProcessPoolExecutor(max_workers=max_workers) if max_workers != 1 else nullcontext() as executor:
+            for interval in range(number_of_intervals):
+                print(f"--- Interval {interval + 1}: {t_start} to {t_end} days ---")
+                # the last solution of each RVE is the initial condition for this interval
+                initial_conditions = np.column_stack([results[field][interval] for field in state_fields])
+                stresses_xx = cross_section['stress_xx'].to_numpy()
+                block_arguments = ([self.models[block] for block in blocks], [stresses_xx[block] for block in blocks],
+                                   [initial_conditions[block] for block in blocks], [t_start] * number_of_blocks,
+                                   [t_end] * number_of_blocks)
+                solved_blocks = list((map if executor is None else executor.map)(_solve_RVEs, *block_arguments))
+                models = np.concatenate([block_models for block_models, _ in solved_blocks])
+                final_states = np.concatenate([block_states for _, block_states in solved_blocks])
+                # 2. Save solution at end time point in the results, one row per quantity
+                for column, field in enumerate(state_fields):
+                    results[field][interval + 1] = final_states[:, column]
+                results['SED_bm'][interval + 1] = [model.strain_energy_density for model in models]
+                results['strain_effect_on_OBp'][interval + 1] = [model.strain_effect_on_OBp for model in models]
+                cross_section['BV/TV'] = final_states[:, 5]
+                # models solved in worker processes are copies, keep the updated ones
+                self.models = np.array(models, dtype=object)
+                cross_section = self.update_stress_tensor(cross_section, t_end)
+                results['stress_xx'][interval + 1] = cross_section['stress_xx'].to_numpy()
+                t_start = t_end
+                t_end += self.time_for_mechanics_update
         return cross_section, results
 
+    def results_to_nested_dict(self, results):
+        """
+        Converts the result arrays of :meth:`solve_spatial_model` to a nested dictionary
+        ``results[time][RVE_index][quantity]`` of floats, e.g. for plotting scripts that loop over time points and RVEs.
+
+        :param results: Result arrays (time points x RVEs) and time points returned by :meth:`solve_spatial_model`.
+        :type results: dict
+        :return: Nested dictionary with the time in days and the RVE index (row of the cross-section) as keys.
+        :rtype: dict
+        """
+        return {int(t): {RVE_index: {field: float(results[field][time_index, RVE_index]) for field in RESULT_FIELDS}
+                         for RVE_index in range(results['BV/TV'].shape[1])}
+                for time_index, t in enumerate(results['time'])}
+
     def update_stress_tensor(self, cross_section, t):
         """
         Recalculates the local axial stress for every RVE based on current stiffness.
@@ -269,15 +441,13 @@ class Lerebours_Model:
         :rtype: pandas.DataFrame
         """
         cross_section = self.calculate_stiffness_for_all_RVEs(cross_section)
-        axial_strain, curvature_y, curvature_z, y_normal_force_center, z_normal_force_center = self.calculate_strain_decomposition(
-            cross_section, t)
-        cross_section['stress_xx'] = np.nan
-        for index, row in cross_section.iterrows():
-            y, z, bone_volume_fraction, element_stiffness = row['y'], row['z'], row['BV/TV'], row['Stiffness']
-            strain_xx = axial_strain - curvature_y * (y - y_normal_force_center) + curvature_z * (
-                    z - z_normal_force_center)
-            stress_xx = element_stiffness * strain_xx
-            cross_section.at[index, 'stress_xx'] = stress_xx
+        # strain decomposition, strain and stress of all RVEs in one compiled call
+        cross_section['stress_xx'] = _axial_stress(cross_section['y'].to_numpy(dtype=np.float64),
+                                                   cross_section['z'].to_numpy(dtype=np.float64),
+                                                   cross_section['Stiffness'].to_numpy(dtype=np.float64),
+                                                   self.parameters.cross_section.delta_y *
+                                                   self.parameters.cross_section.delta_z,
+                                                   *self.calculate_forces_and_moments(t))
         return cross_section
 
     def calculate_strain_decomposition(self, cross_section, t):
@@ -286,7 +456,9 @@ class Lerebours_Model:
 
         Solves the system of equations linking axial force and bending moments
         to the geometric stiffness matrix of the cross-section: determine normal force center, axial stiffness and
-        second moments; insert in moment of area matrix and invert to calculate strain decomposition.
+        second moments; insert in moment of area matrix and solve it to calculate strain decomposition. This is done
+        by the compiled function :func:`_strain_decomposition` (the same quantities as
+        :meth:`calculate_normal_force_center` and :meth:`calculate_second_moments_of_area`, solved in closed form).
 
         :param cross_section: Current spatial data.
         :type cross_section: pandas.DataFrame
@@ -295,11 +467,23 @@ class Lerebours_Model:
         :return: Tuple of (axial_strain, curvature_y, curvature_z, y_nf_center, z_nf_center).
         :rtype: tuple
         """
-        y_normal_force_center, z_normal_force_center, axial_stiffness = self.calculate_normal_force_center(
-            cross_section)
-        second_moment_y, second_moment_z, second_moment_yz = self.calculate_second_moments_of_area(cross_section,
-                                                                                                   y_normal_force_center,
-                                                                                                   z_normal_force_center)
+        # normal force center, axial stiffness, second moments and the solve in one compiled function
+        return _strain_decomposition(cross_section['y'].to_numpy(dtype=np.float64),
+                                     cross_section['z'].to_numpy(dtype=np.float64),
+                                     cross_section['Stiffness'].to_numpy(dtype=np.float64),
+                                     self.parameters.cross_section.delta_y * self.parameters.cross_section.delta_z,
+                                     *self.calculate_forces_and_moments(t))
+
+    def calculate_forces_and_moments(self, t):
+        """
+        Returns the axial force and bending moments acting on the cross-section at time t, i.e. the reference loads
+        reduced by the load case between its start and end time.
+
+        :param t: Current simulation time.
+        :type t: float or None
+        :return: Tuple of (axial_force, bending_moment_y, bending_moment_z).
+        :rtype: tuple of float
+        """
         if t is None or t <= self.load_case.start_time or t >= self.load_case.end_time:
             axial_force = self.parameters.mechanics.axial_force
             bending_moment_y = self.parameters.mechanics.bending_moment_y
@@ -308,14 +492,7 @@ class Lerebours_Model:
             axial_force = self.load_case.force_reduction * self.parameters.mechanics.axial_force
             bending_moment_y = self.load_case.moment_reduction * self.parameters.mechanics.bending_moment_y
             bending_moment_z = self.load_case.moment_reduction * self.parameters.mechanics.bending_moment_z
-        force_and_moments = np.array([axial_force, bending_moment_y, bending_moment_z])
-        moments_of_area_matrix = np.array([[axial_stiffness, 0, 0],
-                                           [0, second_moment_y, -second_moment_yz],
-                                           [0, -second_moment_yz, second_moment_z]])
-        strain_decomposition = np.linalg.inv(moments_of_area_matrix) @ force_and_moments
-        axial_strain, curvature_z, curvature_y = strain_decomposition[0], strain_decomposition[1], strain_decomposition[
-            2]
-        return axial_strain, curvature_y, curvature_z, y_normal_force_center, z_normal_force_center
+        return float(axial_force), float(bending_moment_y), float(bending_moment_z)
 
     def calculate_normal_force_center(self, cross_section):
         """
@@ -326,12 +503,12 @@ class Lerebours_Model:
         :return: Tuple of (y_nf_center, z_nf_center, total_axial_stiffness).
         :rtype: tuple
         """
-        y_normal_force_center = np.sum(cross_section['y'] * cross_section['Stiffness']) / np.sum(
-            cross_section['Stiffness'])
-        z_normal_force_center = np.sum(cross_section['z'] * cross_section['Stiffness']) / np.sum(
-            cross_section['Stiffness'])
-        axial_stiffness = np.sum(
-            cross_section['Stiffness']) * self.parameters.cross_section.delta_y * self.parameters.cross_section.delta_z
+        stiffness = cross_section['Stiffness'].to_numpy()
+        total_stiffness = stiffness.sum()
+        # stiffness-weighted sums as dot products on the underlying arrays
+        y_normal_force_center = stiffness @ cross_section['y'].to_numpy() / total_stiffness
+        z_normal_force_center = stiffness @ cross_section['z'].to_numpy() / total_stiffness
+        axial_stiffness = total_stiffness * self.parameters.cross_section.delta_y * self.parameters.cross_section.delta_z
         return y_normal_force_center, z_normal_force_center, axial_stiffness
 
     def calculate_second_moments_of_area(self, cross_section, y_normal_force_center, z_normal_force_center):
@@ -347,14 +524,15 @@ class Lerebours_Model:
         :return: Tuple of (Iyy, Izz, Iyz).
         :rtype: tuple
         """
-        second_moment_y = np.sum(
-            cross_section['Stiffness'] * ((cross_section['z'] - z_normal_force_center) ** 2) * self.parameters.cross_section.delta_y * self.parameters.cross_section.delta_z)
-        second_moment_z = np.sum(
-            cross_section['Stiffness'] * ((cross_section['y'] - y_normal_force_center) ** 2) * self.parameters.cross_section.delta_y * self.parameters.cross_section.delta_z)
-        second_moment_yz = np.sum(
-            cross_section['Stiffness'] * (cross_section['y'] - y_normal_force_center) * (
-                    cross_section['z'] - z_normal_force_center) *
-            self.parameters.cross_section.delta_y * self.parameters.cross_section.delta_z)
+        element_area = self.parameters.cross_section.delta_y * self.parameters.cross_section.delta_z
+        stiffness = cross_section['Stiffness'].to_numpy()
+        y_distance = cross_section['y'].to_numpy() - y_normal_force_center
+        z_distance = cross_section['z'].to_numpy() - z_normal_force_center
+        # stiffness-weighted distance reused for the product of area, each reduction is a single dot product
+        weighted_z_distance = stiffness * z_distance
+        second_moment_y = (weighted_z_distance @ z_distance) * element_area
+        second_moment_z = ((stiffness * y_distance) @ y_distance) * element_area
+        second_moment_yz = (weighted_z_distance @ y_distance) * element_area
         return second_moment_y, second_moment_z, second_moment_yz
 
     def calculate_stiffness_for_all_RVEs(self, cross_section):
@@ -362,16 +540,21 @@ class Lerebours_Model:
         Performs homogenization to find the effective longitudinal stiffness of each RVE.
 
         Calls the BCPM homogenization methods to determine the macroscopic
-        stiffness tensor based on local bone volume fraction.
+        stiffness tensor based on local bone volume fraction. Apart from the bone volume fraction, the homogenization
+        only depends on the mechanical parameters, which are the same for the BCPMs of all RVEs. It is therefore
+        evaluated with the BCPM of the first RVE (``self.models``, set in :meth:`solve_spatial_model`) for all RVEs,
+        so the Hill tensor (numerical integration) is computed once and then reused from its parameters instead of
+        once per RVE.
 
         :param cross_section: Current spatial data.
         :type cross_section: pandas.DataFrame
         :return: Updated cross-section with 'Stiffness' column (in Pa).
         :rtype: pandas.DataFrame
         """
-        cross_section['Stiffness'] = np.nan
-        for index, row in cross_section.iterrows():
-            bone_volume_fraction, bone_cell_model = row['BV/TV'], row['models']
+        bone_cell_model = self.models[0]
+        bone_volume_fractions = cross_section['BV/TV'].to_numpy()
+        stiffness = np.empty(len(bone_volume_fractions))
+        for index, bone_volume_fraction in enumerate(bone_volume_fractions):
             strain_concentration_tensor_bone_matrix, strain_concentration_tensor_vascular_pores = bone_cell_model.calculate_strain_concentration_tensors(
                 bone_volume_fraction*100)
             macroscopic_stiffness_tensor = bone_cell_model.calculate_macroscopic_stiffness_tensor(
@@ -379,5 +562,6 @@ class Lerebours_Model:
                 strain_concentration_tensor_vascular_pores,
                 (1 - bone_volume_fraction)*100,
                 bone_volume_fraction*100)
-            cross_section.at[index, 'Stiffness'] = macroscopic_stiffness_tensor[2, 2] * 1e9  # Convert to Pa
+            stiffness[index] = macroscopic_stiffness_tensor[2, 2] * 1e9  # Convert to Pa
+        cross_section['Stiffness'] = stiffness
         return cross_section
@@ -426,6 +426,8 @@ load_case = Lerebours_Load_Case_Spaceflight()
 model = Lerebours_Model(load_case, duration_of_simulation=4)
 
 cross_section, results = model.solve_spatial_model()
+# result arrays (time points x RVEs) as nested dictionary results[time][RVE_index][quantity]
+results = model.results_to_nested_dict(results)
 # plot_rve_time_series(cross_section, results)
 # plot_initial_strain_effect_distribution(cross_section, results)
 # plot_initial_stress_distribution(cross_section, results)